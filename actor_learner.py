@@ -0,0 +1,316 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+
+try:
+    from pool_env import PoolEnv
+except ImportError:
+    print("Error: Could not import PoolEnv.")
+    print("Make sure pool_env.py is in the same directory or your PYTHONPATH is set correctly.")
+    exit()
+try:
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.logger import configure
+    from stable_baselines3.common.vec_env import DummyVecEnv
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+
+
+# Per-actor counters in the shared stats array.
+STAT_STEPS = 0
+STAT_EPISODES = 1
+STAT_EPISODE_STEPS = 2
+STAT_CPU_TIME = 3
+STAT_WALL_TIME = 4
+STAT_WAIT_TIME = 5
+NUM_STATS = 6
+
+# Seconds the learner waits for a segment before checking that every actor is still alive.
+ACTOR_POLL_INTERVAL = 1.0
+
+
+class SegmentBuffer:
+    """Fixed-size ring of trajectory segment slots in shared memory."""
+
+    def __init__(self, num_slots, segment_len, obs_dim, num_params, names=None):
+        self.num_slots = num_slots
+        self.segment_len = segment_len
+        self.specs = {
+            "obs": ((num_slots, segment_len + 1, obs_dim), np.float32),
+            "actions": ((num_slots, segment_len), np.int64),
+            "rewards": ((num_slots, segment_len), np.float32),
+            "dones": ((num_slots, segment_len), np.float32),
+            "log_probs": ((num_slots, segment_len), np.float32),
+            "versions": ((num_slots,), np.int64),
+            "params": ((num_params,), np.float32),
+        }
+        self.owner = names is None
+        self.shms = {}
+        self.arrays = {}
+        for key, (shape, dtype) in self.specs.items():
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if self.owner:
+                shm = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                shm = shared_memory.SharedMemory(name=names[key])
+            self.shms[key] = shm
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def names(self):
+        return {key: shm.name for key, shm in self.shms.items()}
+
+    def close(self):
+        self.arrays = {}
+        for shm in self.shms.values():
+            shm.close()
+            if self.owner:
+                shm.unlink()
+
+
+def make_policy(num_balls, seed=None):
+    """Builds the MlpPolicy used by both sides, wrapped in a PPO model so it saves like train.py."""
+    env = DummyVecEnv([lambda: PoolEnv(num_balls)])
+    return PPO("MlpPolicy", env, n_steps=2, batch_size=2, seed=seed, device="cpu")
+
+
+def actor(rank, num_balls, buffer_args, names, free_slots, full_slots, version, stats, stop):
+    """Steps its own table continuously and writes fixed-length segments into free slots."""
+    torch.set_num_threads(1)
+    buffer = SegmentBuffer(*buffer_args, names=names)
+    arrays = buffer.arrays
+    env = PoolEnv(num_balls)
+    policy = make_policy(num_balls).policy
+    params = torch.nn.utils.parameters_to_vector(policy.parameters())
+    local_version = -1
+    offset = rank * NUM_STATS
+    episode_steps = 0
+
+    obs, _ = env.reset(seed=rank)
+    cpu_start = time.process_time()
+    wall_start = time.time()
+    while not stop.is_set():
+        wait_start = time.time()
+        try:
+            slot = free_slots.get(timeout=0.1)
+        except queue.Empty:
+            stats[offset + STAT_WAIT_TIME] += time.time() - wait_start
+            continue
+        stats[offset + STAT_WAIT_TIME] += time.time() - wait_start
+
+        with version.get_lock():
+            if version.value != local_version:
+                local_version = version.value
+                params.copy_(torch.from_numpy(arrays["params"]))
+                torch.nn.utils.vector_to_parameters(params, policy.parameters())
+        arrays["versions"][slot] = local_version
+
+        for t in range(buffer.segment_len):
+            arrays["obs"][slot, t] = obs
+            with torch.no_grad():
+                dist = policy.get_distribution(torch.as_tensor(obs).unsqueeze(0))
+                action = dist.sample()
+                log_prob = dist.log_prob(action)
+            action = int(action.item())
+            obs, reward, done, truncated, _ = env.step(action)
+            episode_steps += 1
+            arrays["actions"][slot, t] = action
+            arrays["rewards"][slot, t] = reward
+            arrays["dones"][slot, t] = float(done or truncated)
+            arrays["log_probs"][slot, t] = log_prob.item()
+            if done or truncated:
+                stats[offset + STAT_EPISODES] += 1
+                stats[offset + STAT_EPISODE_STEPS] += episode_steps
+                episode_steps = 0
+                obs, _ = env.reset()
+        arrays["obs"][slot, buffer.segment_len] = obs
+        full_slots.put(slot)
+
+        stats[offset + STAT_STEPS] += buffer.segment_len
+        stats[offset + STAT_CPU_TIME] = time.process_time() - cpu_start
+        stats[offset + STAT_WALL_TIME] = time.time() - wall_start
+    env.close()
+    buffer.close()
+
+
+def vtrace(behaviour_log_probs, target_log_probs, rewards, dones, values, bootstrap_value,
+           gamma=0.99, rho_bar=1.0, c_bar=1.0):
+    """
+    V-trace targets (Espeholt et al., 2018) for [T, B] segments gathered under an older policy.
+    Returns the value targets vs and the policy-gradient advantages.
+    """
+    rhos = torch.exp(target_log_probs - behaviour_log_probs)
+    clipped_rhos = torch.clamp(rhos, max=rho_bar)
+    cs = torch.clamp(rhos, max=c_bar)
+    discounts = gamma * (1.0 - dones)
+    next_values = torch.cat([values[1:], bootstrap_value.unsqueeze(0)], dim=0)
+    deltas = clipped_rhos * (rewards + discounts * next_values - values)
+
+    acc = torch.zeros_like(bootstrap_value)
+    vs_minus_v = torch.zeros_like(values)
+    for t in reversed(range(values.shape[0])):
+        acc = deltas[t] + discounts[t] * cs[t] * acc
+        vs_minus_v[t] = acc
+    vs = values + vs_minus_v
+
+    next_vs = torch.cat([vs[1:], bootstrap_value.unsqueeze(0)], dim=0)
+    advantages = clipped_rhos * (rewards + discounts * next_vs - values)
+    return vs, advantages
+
+
+def next_full_slot(full_slots, actors):
+    """Waits for a filled segment slot; raises RuntimeError once any actor has died."""
+    while True:
+        dead = [rank for rank, p in enumerate(actors) if not p.is_alive()]
+        if dead:
+            codes = ", ".join(f"{rank} (exit code {actors[rank].exitcode})" for rank in dead)
+            raise RuntimeError(f"Actor process died: {codes}")
+        try:
+            return full_slots.get(timeout=ACTOR_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+
+
+def cpu_utilization(cpu_time, wall_time):
+    return cpu_time / wall_time if wall_time > 0 else 0.0
+
+
+def train(num_balls, num_actors, total_timesteps, segment_len=32, batch_segments=8, num_slots=None,
+          gamma=0.99, learning_rate=3e-4, ent_coef=0.01, vf_coef=0.5, max_grad_norm=0.5,
+          log_dir=None, tb_log_name="actor_learner", log_interval=10, seed=None):
+    """
+    Runs num_actors actor processes against one learner until total_timesteps env steps
+    have been consumed. Returns the PPO model holding the learned policy.
+    """
+    num_slots = num_slots or 2 * num_actors + batch_segments
+    model = make_policy(num_balls, seed=seed)
+    policy = model.policy
+    for group in policy.optimizer.param_groups:
+        group["lr"] = learning_rate
+    obs_dim = policy.observation_space.shape[0]
+    params = torch.nn.utils.parameters_to_vector(policy.parameters()).detach()
+
+    buffer_args = (num_slots, segment_len, obs_dim, params.numel())
+    buffer = SegmentBuffer(*buffer_args)
+    arrays = buffer.arrays
+    arrays["params"][:] = params.numpy()
+
+    ctx = mp.get_context("spawn")
+    free_slots = ctx.Queue()
+    full_slots = ctx.Queue()
+    for slot in range(num_slots):
+        free_slots.put(slot)
+    version = ctx.Value("q", 0)
+    stats = ctx.Array("d", num_actors * NUM_STATS)
+    stop = ctx.Event()
+    actors = [
+        ctx.Process(target=actor, daemon=True,
+                    args=(rank, num_balls, buffer_args, buffer.names(), free_slots, full_slots, version, stats, stop))
+        for rank in range(num_actors)
+    ]
+    for p in actors:
+        p.start()
+
+    logger = configure(os.path.join(log_dir, tb_log_name) if log_dir else None,
+                       ["stdout", "tensorboard"] if log_dir else ["stdout"])
+    consumed = 0
+    updates = 0
+    learner_wait = 0.0
+    cpu_start = time.process_time()
+    wall_start = time.time()
+    try:
+        while consumed < total_timesteps:
+            wait_start = time.time()
+            slots = [next_full_slot(full_slots, actors) for _ in range(batch_segments)]
+            learner_wait += time.time() - wait_start
+
+            # [B, T, ...] -> [T, B, ...]
+            obs = torch.as_tensor(arrays["obs"][slots]).transpose(0, 1)
+            actions = torch.as_tensor(arrays["actions"][slots]).transpose(0, 1)
+            rewards = torch.as_tensor(arrays["rewards"][slots]).transpose(0, 1)
+            dones = torch.as_tensor(arrays["dones"][slots]).transpose(0, 1)
+            behaviour_log_probs = torch.as_tensor(arrays["log_probs"][slots]).transpose(0, 1)
+            lag = float(version.value - arrays["versions"][slots].mean())
+            obs = obs.clone()
+            for slot in slots:
+                free_slots.put(slot)
+
+            T, B = actions.shape
+            flat_obs = obs.reshape((T + 1) * B, obs_dim)
+            flat_actions = torch.cat([actions.reshape(T * B), torch.zeros(B, dtype=actions.dtype)])
+            values, log_probs, entropy = policy.evaluate_actions(flat_obs, flat_actions)
+            values = values.reshape(T + 1, B)
+            log_probs = log_probs.reshape(T + 1, B)[:T]
+            entropy = entropy.reshape(T + 1, B)[:T]
+
+            with torch.no_grad():
+                vs, advantages = vtrace(behaviour_log_probs, log_probs.detach(), rewards, dones,
+                                        values[:T].detach(), values[T].detach(), gamma=gamma)
+            policy_loss = -(advantages * log_probs).mean()
+            value_loss = 0.5 * ((vs - values[:T]) ** 2).mean()
+            entropy_loss = -entropy.mean()
+            loss = policy_loss + vf_coef * value_loss + ent_coef * entropy_loss
+
+            policy.optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(policy.parameters(), max_grad_norm)
+            policy.optimizer.step()
+
+            new_params = torch.nn.utils.parameters_to_vector(policy.parameters()).detach().numpy()
+            with version.get_lock():
+                arrays["params"][:] = new_params
+                version.value += 1
+            consumed += T * B
+            updates += 1
+
+            if updates % log_interval == 0:
+                wall = time.time() - wall_start
+                actor_stats = np.frombuffer(stats.get_obj()).reshape(num_actors, NUM_STATS)
+                episodes = actor_stats[:, STAT_EPISODES].sum()
+                logger.record("time/total_timesteps", consumed)
+                logger.record("time/fps", consumed / wall)
+                logger.record("train/policy_loss", policy_loss.item())
+                logger.record("train/value_loss", value_loss.item())
+                logger.record("train/entropy_loss", entropy_loss.item())
+                logger.record("train/policy_lag", lag)
+                logger.record("train/mean_rho", torch.exp(log_probs.detach() - behaviour_log_probs).mean().item())
+                if episodes > 0:
+                    logger.record("rollout/ep_len_mean", actor_stats[:, STAT_EPISODE_STEPS].sum() / episodes)
+                logger.record("cpu/learner_utilization", cpu_utilization(time.process_time() - cpu_start, wall))
+                logger.record("cpu/learner_wait_fraction", learner_wait / wall)
+                logger.record("cpu/actor_utilization", float(np.mean([
+                    cpu_utilization(s[STAT_CPU_TIME], s[STAT_WALL_TIME]) for s in actor_stats])))
+                logger.record("cpu/actor_wait_fraction", float(np.mean([
+                    s[STAT_WAIT_TIME] / s[STAT_WALL_TIME] if s[STAT_WALL_TIME] > 0 else 0.0 for s in actor_stats])))
+                logger.dump(consumed)
+    finally:
+        stop.set()
+        for p in actors:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        buffer.close()
+    model.num_timesteps = consumed
+    return model
+
+
+if __name__ == "__main__":
+    NUM_BALLS = 4
+    NUM_ACTORS = 4
+    TOTAL_TIMESTEPS = 200000
+    MODEL_NAME = f"actor_learner_pool_n{NUM_BALLS}"
+    LOG_DIR = "./pool_logs/"
+    MODEL_SAVE_DIR = "./pool_models/"
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(MODEL_SAVE_DIR, exist_ok=True)
+    model = train(NUM_BALLS, NUM_ACTORS, TOTAL_TIMESTEPS, log_dir=LOG_DIR, tb_log_name=MODEL_NAME)
+    final_model_path = os.path.join(MODEL_SAVE_DIR, f"{MODEL_NAME}_final")
+    print(f"Saving final model to: {final_model_path}")
+    model.save(final_model_path)
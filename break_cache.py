@@ -0,0 +1,133 @@
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from const import BREAK_ANGLE_OFFSETS, BREAK_ANGLE_STEP, BREAK_CUE_OFFSETS, BREAK_POSITION
+
+
+def break_key(table, rng=random):
+    """
+    Draws a break shot for a freshly racked table: (cue x, cue y, angle index), where the
+    shot angle is angle index * BREAK_ANGLE_STEP. The key alone determines the shot.
+    """
+    x, y = BREAK_POSITION[0], BREAK_POSITION[1] + rng.choice(BREAK_CUE_OFFSETS)
+    apex = table.balls[1].body.position
+    aim = round(math.atan2(apex.y - y, apex.x - x) / BREAK_ANGLE_STEP)
+    return x, y, aim + rng.randint(-BREAK_ANGLE_OFFSETS, BREAK_ANGLE_OFFSETS)
+
+
+def break_outcome(table):
+    """Returns (positions, pocketed) right after the break; a scratched cue counts as pocketed."""
+    positions = np.array([ball.body.position for ball in table.balls], dtype=np.float64)
+    pocketed = np.array([ball.pocketed for ball in table.balls], dtype=bool)
+    for index, _, _ in table.logging["pocket_events"]:
+        pocketed[index] = True
+    return positions, pocketed
+
+
+class BreakCache:
+    """
+    Outcomes of break shots from the racked triangle, keyed by break_key. With a path, the
+    cache is loaded from that .npz file and saved back to it by save(); save() merges with
+    what other processes wrote in the meantime, so envs in different workers can share a file.
+    """
+
+    def __init__(self, num_balls, preset="default", path=None):
+        self.num_balls = num_balls
+        self.preset = preset
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.unsaved = 0
+        if path is not None and os.path.exists(path):
+            self.entries.update(self.read(path))
+
+    def read(self, path):
+        with np.load(path) as data:
+            if int(data["num_balls"]) != self.num_balls or str(data["preset"]) != self.preset:
+                raise ValueError(f"{path} holds breaks for {int(data['num_balls'])} balls with the "
+                                 f"{str(data['preset'])!r} preset, not {self.num_balls} with {self.preset!r}")
+            return {tuple(int(v) for v in key): (positions, pocketed)
+                    for key, positions, pocketed in zip(data["keys"], data["positions"], data["pocketed"])}
+
+    def get(self, key):
+        outcome = self.entries.get(key)
+        if outcome is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return outcome
+
+    def put(self, key, positions, pocketed):
+        self.entries[key] = (positions, pocketed)
+        self.unsaved += 1
+
+    def save(self):
+        """Writes the cache to its path, atomically renamed into place."""
+        if self.path is None or not self.unsaved:
+            return
+        if os.path.exists(self.path):
+            self.entries = {**self.read(self.path), **self.entries}
+        keys = list(self.entries)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            num_balls=self.num_balls,
+            preset=self.preset,
+            keys=np.array(keys, dtype=np.int64).reshape(-1, 3),
+            positions=np.array([self.entries[k][0] for k in keys]).reshape(-1, self.num_balls, 2),
+            pocketed=np.array([self.entries[k][1] for k in keys]).reshape(-1, self.num_balls),
+        )
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+def play_break(table, key, cache=None):
+    """
+    Plays the break given by key on a freshly racked table. A break the cache has seen is
+    applied from its stored outcome instead of being simulated. Returns True on a cache hit.
+    """
+    x, y, angle_index = key
+    table.cue_ball.body.position = x, y
+    outcome = cache.get(key) if cache is not None else None
+    if outcome is not None:
+        table.apply_outcome(*outcome)
+        return True
+    table.strike(angle_index * BREAK_ANGLE_STEP)
+    if cache is not None:
+        cache.put(key, *break_outcome(table))
+    return False
+
+
+if __name__ == "__main__":
+    from pool_env import PoolEnv
+
+    NUM_BALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    EPISODES = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    random.seed(0)
+    env = PoolEnv(NUM_BALLS, break_shot=True)
+    times = {True: [], False: []}
+    for _ in range(EPISODES):
+        start = time.perf_counter()
+        _, info = env.reset()
+        times[info["break"]["cached"]].append(time.perf_counter() - start)
+    env.close()
+    stats = env.break_cache.stats()
+    print(f"{EPISODES} resets, {NUM_BALLS} balls: hit rate {stats['hit_rate']:.1%}, {stats['size']} cached breaks")
+    for cached, label in ((False, "simulated"), (True, "cached")):
+        if times[cached]:
+            print(f"{label:>10} break reset: {np.mean(times[cached]) * 1000:7.2f} ms ({len(times[cached])})")
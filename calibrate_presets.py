@@ -0,0 +1,58 @@
+import random
+import sys
+import time
+
+import numpy as np
+
+from const import PHYSICS_PRESETS, POCKETS
+from table import Table
+
+
+def run_shots(n, preset, seeds):
+    """Plays one seeded shot per seed and returns final positions, pocketed sets and total time."""
+    table = Table(n, preset=preset)
+    positions = []
+    pocketed = []
+    elapsed = 0.0
+    for seed in seeds:
+        random.seed(seed)
+        table.reset()
+        action = random.randrange((n - 1) * len(POCKETS))
+        start = time.perf_counter()
+        table.make_shot(action)
+        elapsed += time.perf_counter() - start
+        positions.append(np.array([ball.body.position for ball in table.balls]))
+        pocketed.append(frozenset(index for index, _, _ in table.logging["pocket_events"]))
+    table.close()
+    return positions, pocketed, elapsed
+
+
+def compare(reference, candidate):
+    """Returns (mean position error, max position error, pot outcome agreement)."""
+    ref_positions, ref_pocketed, _ = reference
+    positions, pocketed, _ = candidate
+    errors = []
+    for ref_pos, pos, ref_pot, pot in zip(ref_positions, positions, ref_pocketed, pocketed):
+        on_table = [i for i in range(len(pos)) if i not in ref_pot and i not in pot]
+        if on_table:
+            errors.extend(np.linalg.norm(ref_pos[on_table] - pos[on_table], axis=1))
+    agreement = np.mean([a == b for a, b in zip(ref_pocketed, pocketed)])
+    errors = errors or [0.0]
+    return float(np.mean(errors)), float(np.max(errors)), float(agreement)
+
+
+if __name__ == "__main__":
+    NUM_BALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    NUM_SHOTS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    REFERENCE = "precise"
+
+    seeds = range(NUM_SHOTS)
+    results = {preset: run_shots(NUM_BALLS, preset, seeds) for preset in PHYSICS_PRESETS}
+    reference = results[REFERENCE]
+
+    print(f"{NUM_SHOTS} seeded shots with {NUM_BALLS} balls, compared against '{REFERENCE}'")
+    print(f"{'preset':>10} {'time (s)':>9} {'speedup':>8} {'mean err':>9} {'max err':>9} {'pots agree':>11}")
+    for preset, result in results.items():
+        mean_err, max_err, agreement = compare(reference, result)
+        speedup = reference[2] / result[2]
+        print(f"{preset:>10} {result[2]:9.2f} {speedup:7.2f}x {mean_err:8.1f}px {max_err:8.1f}px {agreement:10.1%}")
@@ -0,0 +1,156 @@
+import copy
+import glob
+import os
+import queue
+import re
+import threading
+import time
+import zipfile
+
+import torch
+
+try:
+    import stable_baselines3 as sb3
+    from stable_baselines3.common.callbacks import BaseCallback
+    from stable_baselines3.common.save_util import data_to_json
+    from stable_baselines3.common.utils import get_system_info
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+
+
+def snapshot_model(model):
+    """
+    Captures everything BaseAlgorithm.save writes, detached from the live model: the
+    class attributes are serialized right away and tensors are copied, so training can
+    keep updating the model while the snapshot is written.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for torch_var in state_dicts_names + torch_variable_names:
+        exclude.add(torch_var.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+
+    pytorch_variables = {}
+    for name in torch_variable_names:
+        attr = model
+        for part in name.split("."):
+            attr = getattr(attr, part)
+        pytorch_variables[name] = copy.deepcopy(attr)
+    params = {name: copy.deepcopy(state_dict) for name, state_dict in model.get_parameters().items()}
+    return data_to_json(data), params, pytorch_variables
+
+
+def write_checkpoint(path, snapshot):
+    """Writes a snapshot in the zip layout of save_to_zip_file, atomically renamed into place."""
+    serialized_data, params, pytorch_variables = snapshot
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(tmp_path, mode="w") as archive:
+        archive.writestr("data", serialized_data)
+        with archive.open("pytorch_variables.pth", mode="w", force_zip64=True) as f:
+            torch.save(pytorch_variables, f)
+        for file_name, state_dict in params.items():
+            with archive.open(file_name + ".pth", mode="w", force_zip64=True) as f:
+                torch.save(state_dict, f)
+        archive.writestr("_stable_baselines3_version", sb3.__version__)
+        archive.writestr("system_info.txt", get_system_info(print_info=False)[1])
+    os.replace(tmp_path, path)
+
+
+def latest_checkpoint(save_path, name_prefix):
+    """Returns the path of the newest complete '<prefix>_<steps>_steps.zip', or None."""
+    pattern = re.compile(re.escape(name_prefix) + r"_(\d+)_steps\.zip$")
+    candidates = []
+    for path in glob.glob(os.path.join(save_path, f"{name_prefix}_*_steps.zip")):
+        match = pattern.search(os.path.basename(path))
+        if match:
+            candidates.append((int(match.group(1)), path))
+    for _, path in sorted(candidates, reverse=True):
+        try:
+            with zipfile.ZipFile(path) as archive:
+                if "data" in archive.namelist() and "policy.pth" in archive.namelist():
+                    return path
+        except zipfile.BadZipFile:
+            continue
+    return None
+
+
+class BackgroundCheckpointCallback(BaseCallback):
+    """
+    Drop-in replacement for CheckpointCallback that only snapshots the model on the
+    training thread and writes the zip on a background thread. At most max_pending
+    snapshots wait to be written; checkpoints due while the queue is full are skipped.
+    Each function in listeners is called as listener(path, timesteps) on the writer thread
+    once a checkpoint is complete on disk.
+    """
+
+    def __init__(self, save_freq, save_path, name_prefix="rl_model", max_pending=1, verbose=0):
+        super().__init__(verbose)
+        self.save_freq = save_freq
+        self.save_path = save_path
+        self.name_prefix = name_prefix
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = None
+        self.skipped = 0
+        self.written = 0
+        self.errors = []
+        self.listeners = []
+
+    def start(self):
+        if self.thread is None:
+            os.makedirs(self.save_path, exist_ok=True)
+            self.thread = threading.Thread(target=self.writer, daemon=True)
+            self.thread.start()
+
+    def _init_callback(self):
+        self.start()
+
+    def writer(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            path, snapshot, timesteps = item
+            try:
+                write_checkpoint(path, snapshot)
+                self.written += 1
+                if self.verbose >= 2:
+                    print(f"Saving model checkpoint to {path}")
+            except Exception as e:
+                self.errors.append(e)
+                print(f"Error: Could not write checkpoint {path}: {e}")
+                continue
+            for listener in self.listeners:
+                listener(path, timesteps)
+
+    def checkpoint_path(self):
+        return os.path.join(self.save_path, f"{self.name_prefix}_{self.num_timesteps}_steps.zip")
+
+    def _on_step(self):
+        if self.n_calls % self.save_freq == 0:
+            if self.queue.full():
+                self.skipped += 1
+                self.logger.record("checkpoint/skipped", self.skipped)
+                return True
+            start = time.perf_counter()
+            self.queue.put((self.checkpoint_path(), snapshot_model(self.model), self.num_timesteps))
+            self.logger.record("checkpoint/snapshot_ms", (time.perf_counter() - start) * 1000)
+        return True
+
+    def save_now(self, path, model=None):
+        """Queues a snapshot for path (".zip" is appended if missing), waiting for a free slot."""
+        self.start()
+        if not path.endswith(".zip"):
+            path += ".zip"
+        model = model or self.model
+        self.queue.put((path, snapshot_model(model), model.num_timesteps))
+
+    def close(self):
+        """Waits until every queued checkpoint has been written."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
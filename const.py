@@ -2,8 +2,32 @@ WIDTH, HEIGHT = 1280, 640
 BALL_RADIUS = 14
 FIELD = [(30,0), (1250,0), (1280, 30), (1280, 610), (1250, 640), (30, 640), (0, 610), (0, 30)]
 POCKETS = [(0,0), (640,0), (WIDTH,0), (WIDTH,HEIGHT), (640, HEIGHT), (0,HEIGHT)]
+# Openings between the cushions, one per pocket in POCKETS order, wound like FIELD.
+POCKET_MOUTHS = [((0,30), (30,0)), ((615,0), (665,0)), ((1250,0), (1280,30)), ((1280,610), (1250,640)), ((665,640), (615,640)), ((30,640), (0,610))]
 SPEED_THRESHOLD = 15
 SHOOT_FORCE = 800
+POCKET_DEPTH = 100
+CUE_COLLISION_TYPE = 1
+WHITE_COLLISION_TYPE = 2
+WALL_COLLISION_TYPE = 3
+POCKET_COLLISION_TYPE = 4
+CONTACT_CAPACITY = 4096
+FAST_FORWARD_INTERVAL = 30
+FAST_FORWARD_MARGIN = 1
+
+BREAK_POSITION = (320, HEIGHT // 2)
+# Break shots: the cue ball sits at BREAK_POSITION shifted by one of BREAK_CUE_OFFSETS in y and
+# is aimed at the apex ball plus up to BREAK_ANGLE_OFFSETS steps of BREAK_ANGLE_STEP radians.
+BREAK_CUE_OFFSETS = (-56, -42, -28, -14, 0, 14, 28, 42, 56)
+BREAK_ANGLE_STEP = 0.01
+BREAK_ANGLE_OFFSETS = 5
+LARGE_RACK_HASH_CELLS_PER_BALL = 10
+# pymunk's threaded solver runs on at most two threads.
+MAX_SOLVER_THREADS = 2
+# Outcomes applied without simulating (Table.apply_outcome) push apart balls overlapping by more
+# than this many pixels; pymunk's own resting contacts overlap by less.
+OVERLAP_TOLERANCE = 0.5
+SEPARATION_ITERATIONS = 50
 MASS = 1
 DAMPING = 1
 
@@ -12,10 +36,36 @@ G = 10
 ALPHA = 0.03
 BETA = 0.0003
 ELASTICITY = 1
+WALL_ELASTICITY = 0.7
+
+# Friction decay per substep is tuned for REFERENCE_TIMESTEP; other timesteps rescale it.
+REFERENCE_TIMESTEP = 1 / 300
+FRICTION_DT = 1 / 60
+PHYSICS_PRESETS = {
+    "fast": {"timestep": 1 / 120, "iterations": 5, "settle_speed": 5},
+    "default": {"timestep": 1 / 300, "iterations": 10, "settle_speed": 0},
+    "precise": {"timestep": 1 / 600, "iterations": 20, "settle_speed": 0},
+}
 
 
 WHITE = (255, 255, 255)
 RED = (255, 0, 0)
 GREEN = (0, 128, 0)
 BROWN = (139, 69, 19)
-BLACK = (0, 0, 0)
\ No newline at end of file
+BLACK = (0, 0, 0)
+
+# Feature groups of the observation, in the order they are concatenated.
+OBSERVATION_GROUPS = ("time", "cue", "balls", "straightness", "possibility")
+
+# Cushion and pocket lines as drawn by the renderers.
+WALL_LINES = [
+    ((30, 0), (620, 0)), ((660, 0), (1250, 0)), ((30, 640), (620, 640)),
+    ((660, 640), (1250, 640)), ((0, 30), (0, 610)), ((1280, 30), (1280, 610)),
+]
+POCKET_LINES = [
+    ((0, 30), (30, 0)), ((1250, 0), (1280, 30)), ((0, 610), (30, 640)),
+    ((1250, 640), (1280, 610)), ((620, 0), (660, 0)), ((620, 640), (660, 640)),
+]
+
+# Where the live viewer listens for position updates (UDP).
+VIEWER_ADDRESS = ("127.0.0.1", 5077)
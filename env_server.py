@@ -0,0 +1,422 @@
+import asyncio
+import multiprocessing as mp
+import random
+import socket
+import struct
+import sys
+
+import numpy as np
+from gymnasium import spaces
+
+try:
+    from stable_baselines3.common.vec_env import VecEnv
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+
+
+OP_CREATE = 1
+OP_RESET = 2
+OP_STEP = 3
+OP_CLOSE = 4
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Every frame is <length:u32> followed by a header and an op-specific payload.
+FRAME = struct.Struct("<I")
+REQUEST = struct.Struct("<BIIi")   # op, request id, env id, argument (balls / seed / action)
+RESPONSE = struct.Struct("<BIIi")  # status, request id, env id, observation / error message length
+CREATE_RESULT = struct.Struct("<I")  # observation length, after the action count in the header
+STEP_RESULT = struct.Struct("<fB")  # reward, done
+
+MAX_BATCH = 64
+
+
+def parse_address(address):
+    """Returns (family, address) for 'host:port' strings or Unix socket paths."""
+    if isinstance(address, tuple):
+        return socket.AF_INET, address
+    if ":" in address and not address.startswith("/"):
+        host, port = address.rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+def worker(conn):
+    """Owns a set of PoolEnv instances and executes batches of requests on them."""
+    from pool_env import PoolEnv
+
+    envs = {}
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        results = []
+        for op, env_id, arg in batch:
+            try:
+                if op == OP_CREATE:
+                    envs[env_id] = PoolEnv(arg)
+                    results.append((STATUS_OK, envs[env_id].num_actions, envs[env_id].observation_space.shape[0]))
+                elif op == OP_RESET:
+                    # Table draws its layouts from the global random module.
+                    if arg >= 0:
+                        random.seed(arg)
+                    obs, _ = envs[env_id].reset(seed=arg if arg >= 0 else None)
+                    results.append((STATUS_OK, obs, None))
+                elif op == OP_STEP:
+                    env = envs[env_id]
+                    obs, reward, done, truncated, _ = env.step(arg)
+                    terminal = None
+                    if done or truncated:
+                        terminal = obs
+                        obs, _ = env.reset()
+                    results.append((STATUS_OK, obs, (reward, done or truncated, terminal)))
+                elif op == OP_CLOSE:
+                    envs.pop(env_id).close()
+                    results.append((STATUS_OK, None, None))
+                else:
+                    results.append((STATUS_ERROR, f"unknown op {op}", None))
+            except Exception as e:
+                results.append((STATUS_ERROR, f"{type(e).__name__}: {e}", None))
+        conn.send(results)
+    for env in envs.values():
+        env.close()
+    conn.close()
+
+
+class WorkerHandle:
+    """Queues requests for one worker process and ships them over in batches."""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=worker, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.queue = asyncio.Queue()
+        self.num_envs = 0
+        self.error = None
+        self.batches = 0
+        self.requests = 0
+
+    def roundtrip(self, batch):
+        self.conn.send(batch)
+        return self.conn.recv()
+
+    async def submit(self, op, env_id, arg):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((op, env_id, arg), future))
+        return await future
+
+    async def dispatch(self):
+        """
+        Sends everything queued since the last batch returned as one batch. Once the worker
+        process is gone, every pending and later request fails with an error result.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            while not self.queue.empty() and len(items) < MAX_BATCH:
+                items.append(self.queue.get_nowait())
+            if self.error is None:
+                try:
+                    results = await loop.run_in_executor(None, self.roundtrip, [item for item, _ in items])
+                except (EOFError, OSError):
+                    self.process.join(timeout=1)
+                    self.error = f"env worker {self.process.pid} died (exit code {self.process.exitcode})"
+            if self.error is not None:
+                results = [(STATUS_ERROR, self.error, None)] * len(items)
+            self.batches += 1
+            self.requests += len(items)
+            for (_, future), result in zip(items, results):
+                if not future.cancelled():
+                    future.set_result(result)
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class EnvServer:
+    """Hosts PoolEnv instances on worker processes behind a binary TCP/Unix protocol."""
+
+    def __init__(self, address, num_workers=2):
+        self.address = address
+        self.num_workers = num_workers
+        self.workers = []
+        self.tasks = []
+        self.env_worker = {}
+        self.next_env_id = 0
+        self.server = None
+
+    async def start(self):
+        ctx = mp.get_context("spawn")
+        self.workers = [WorkerHandle(ctx) for _ in range(self.num_workers)]
+        self.tasks = [asyncio.create_task(w.dispatch()) for w in self.workers]
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=address)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, *address)
+        return self.server
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+        for w in self.workers:
+            w.close()
+
+    def bound_address(self):
+        """Returns the listening address, with the real port when started on port 0."""
+        name = self.server.sockets[0].getsockname()
+        if isinstance(name, tuple):
+            return f"{name[0]}:{name[1]}"
+        return name
+
+    def stats(self):
+        """Returns (requests, batches) summed over all workers."""
+        return sum(w.requests for w in self.workers), sum(w.batches for w in self.workers)
+
+    async def handle_client(self, reader, writer):
+        lock = asyncio.Lock()
+        owned = set()
+        pending = set()
+        try:
+            while True:
+                (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                op, req_id, env_id, arg = REQUEST.unpack(await reader.readexactly(length))
+                if op == OP_CREATE:
+                    env_id = self.next_env_id
+                    self.next_env_id += 1
+                    worker = min(self.workers, key=lambda w: (w.error is not None, w.num_envs))
+                    worker.num_envs += 1
+                    self.env_worker[env_id] = worker
+                    owned.add(env_id)
+                task = asyncio.create_task(self.handle_request(writer, lock, owned, op, req_id, env_id, arg))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for env_id in owned:
+                worker = self.env_worker.pop(env_id, None)
+                if worker is not None:
+                    worker.num_envs -= 1
+                    await worker.submit(OP_CLOSE, env_id, 0)
+            writer.close()
+
+    async def handle_request(self, writer, lock, owned, op, req_id, env_id, arg):
+        if env_id not in owned:
+            status, value, extra = STATUS_ERROR, f"env {env_id} is not owned by this connection", None
+        else:
+            status, value, extra = await self.env_worker[env_id].submit(op, env_id, arg)
+            if op == OP_CLOSE and status == STATUS_OK or op == OP_CREATE and status == STATUS_ERROR:
+                owned.discard(env_id)
+                self.env_worker.pop(env_id).num_envs -= 1
+        payload = b""
+        length = 0
+        if status == STATUS_ERROR:
+            payload = value.encode()
+            length = len(payload)
+        elif op == OP_CREATE:
+            length = value
+            payload = CREATE_RESULT.pack(extra)
+        elif op in (OP_RESET, OP_STEP):
+            length = len(value)
+            payload = np.asarray(value, dtype=np.float32).tobytes()
+            if op == OP_STEP:
+                reward, done, terminal = extra
+                payload = STEP_RESULT.pack(reward, done) + payload
+                if done:
+                    payload += np.asarray(terminal, dtype=np.float32).tobytes()
+        body = RESPONSE.pack(status, req_id, env_id, length) + payload
+        async with lock:
+            writer.write(FRAME.pack(len(body)) + body)
+            await writer.drain()
+
+
+class EnvClient:
+    """Blocking client for EnvServer that pipelines requests over one socket."""
+
+    def __init__(self, address):
+        family, address = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.connect(address)
+        self.next_req_id = 0
+
+    def recv_exact(self, size):
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.sock.recv(size - len(buf))
+            if not chunk:
+                raise ConnectionError("Env server closed the connection.")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def send(self, requests):
+        """Sends (op, env_id, arg) requests in one write and returns their request ids."""
+        ids = []
+        data = bytearray()
+        for op, env_id, arg in requests:
+            ids.append(self.next_req_id)
+            data += FRAME.pack(REQUEST.size) + REQUEST.pack(op, self.next_req_id, env_id, arg)
+            self.next_req_id = (self.next_req_id + 1) % 2**32
+        self.sock.sendall(data)
+        return ids
+
+    def receive(self, ids, ops):
+        """Waits for the responses to ids, which may arrive in any order."""
+        op_of = dict(zip(ids, ops))
+        results = {}
+        while len(results) < len(ids):
+            (length,) = FRAME.unpack(self.recv_exact(FRAME.size))
+            body = self.recv_exact(length)
+            status, req_id, env_id, obs_len = RESPONSE.unpack_from(body)
+            offset = RESPONSE.size
+            if status != STATUS_OK:
+                message = body[offset:offset + obs_len].decode()
+                raise RuntimeError(f"Env server request {req_id} on env {env_id} failed: {message}")
+            op = op_of[req_id]
+            if op == OP_CREATE:
+                results[req_id] = (env_id, obs_len, CREATE_RESULT.unpack_from(body, offset)[0])
+            elif op == OP_RESET:
+                results[req_id] = np.frombuffer(body, np.float32, obs_len, offset)
+            elif op == OP_STEP:
+                reward, done = STEP_RESULT.unpack_from(body, offset)
+                offset += STEP_RESULT.size
+                obs = np.frombuffer(body, np.float32, obs_len, offset)
+                terminal = None
+                if done:
+                    terminal = np.frombuffer(body, np.float32, obs_len, offset + 4 * obs_len)
+                results[req_id] = (obs, reward, bool(done), terminal)
+            else:
+                results[req_id] = None
+        return [results[i] for i in ids]
+
+    def request(self, requests):
+        ids = self.send(requests)
+        return self.receive(ids, [op for op, _, _ in requests])
+
+    def close(self):
+        self.sock.close()
+
+
+class RemoteVecEnv(VecEnv):
+    """SB3 VecEnv whose environments live on an EnvServer."""
+
+    def __init__(self, address, num_envs, n):
+        self.client = EnvClient(address)
+        created = self.client.request([(OP_CREATE, 0, n)] * num_envs)
+        self.env_ids = [env_id for env_id, _, _ in created]
+        _, num_actions, obs_dim = created[0]
+        observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(obs_dim,), dtype=np.float32)
+        super().__init__(num_envs, observation_space, spaces.Discrete(num_actions))
+        self.seeds = [-1] * num_envs
+        self.actions = None
+
+    def reset(self):
+        requests = [(OP_RESET, env_id, seed) for env_id, seed in zip(self.env_ids, self.seeds)]
+        self.seeds = [-1] * self.num_envs
+        return np.stack(self.client.request(requests))
+
+    def step_async(self, actions):
+        self.actions = actions
+        requests = [(OP_STEP, env_id, int(a)) for env_id, a in zip(self.env_ids, actions)]
+        self.pending = self.client.send(requests)
+
+    def step_wait(self):
+        results = self.client.receive(self.pending, [OP_STEP] * self.num_envs)
+        obs = np.stack([r[0] for r in results])
+        rewards = np.array([r[1] for r in results], dtype=np.float32)
+        dones = np.array([r[2] for r in results], dtype=bool)
+        infos = []
+        for _, _, done, terminal in results:
+            info = {"TimeLimit.truncated": False}
+            if done:
+                info["terminal_observation"] = terminal
+            infos.append(info)
+        return obs, rewards, dones, infos
+
+    def close(self):
+        self.client.request([(OP_CLOSE, env_id, 0) for env_id in self.env_ids])
+        self.client.close()
+
+    def seed(self, seed=None):
+        """Seeds the layouts drawn by the next reset, one seed per environment."""
+        if seed is None:
+            return [None] * self.num_envs
+        self.seeds = [seed + i for i in range(self.num_envs)]
+        return self.seeds
+
+    def get_attr(self, attr_name, indices=None):
+        if attr_name == "render_mode":
+            return [None for _ in self._get_indices(indices)]
+        raise AttributeError(f"RemoteVecEnv does not expose '{attr_name}'.")
+
+    def set_attr(self, attr_name, value, indices=None):
+        raise AttributeError(f"RemoteVecEnv does not expose '{attr_name}'.")
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        raise AttributeError(f"RemoteVecEnv does not expose '{method_name}'.")
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+
+def run_server(address, num_workers):
+    server = EnvServer(address, num_workers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    import threading
+    import time
+
+    ADDRESS = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1:5757"
+    NUM_WORKERS = 2
+    NUM_ENVS = 8
+    NUM_BALLS = 4
+
+    loop = asyncio.new_event_loop()
+    server = EnvServer(ADDRESS, NUM_WORKERS)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    vec_env = RemoteVecEnv(ADDRESS, NUM_ENVS, NUM_BALLS)
+    obs = vec_env.reset()
+    start = time.time()
+    steps = 50
+    for _ in range(steps):
+        actions = np.array([vec_env.action_space.sample() for _ in range(NUM_ENVS)])
+        obs, rewards, dones, infos = vec_env.step(actions)
+    elapsed = time.time() - start
+    vec_env.close()
+
+    requests, batches = server.stats()
+    print(f"Observation shape: {obs.shape}")
+    print(f"Env steps/sec: {steps * NUM_ENVS / elapsed:.1f}")
+    print(f"Requests per worker batch: {requests / max(batches, 1):.2f}")
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
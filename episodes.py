@@ -0,0 +1,70 @@
+import os
+import random
+
+import numpy as np
+
+try:
+    from pool_env import PoolEnv
+except ImportError:
+    print("Error: Could not import PoolEnv.")
+    print("Make sure pool_env.py is in the same directory or your PYTHONPATH is set correctly.")
+    exit()
+from numpy_policy import NumpyPolicy
+from const import OBSERVATION_GROUPS
+
+
+# Evaluation episodes, kept free of torch and stable-baselines3 so that workers playing
+# exported .npz policies never import them.
+
+
+def init_eval_worker(cpus):
+    """Pins an evaluation worker to its own cores."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def run_episodes(path, num_balls, seeds, max_steps, observation_groups=OBSERVATION_GROUPS):
+    """
+    Plays one deterministic episode per seed with the checkpoint at path: an .npz from
+    export_policy, run with NumPy only, or a stable-baselines3 .zip, which loads torch.
+    """
+    if path.endswith(".npz"):
+        predict = NumpyPolicy.load(path).predict
+    else:
+        import torch
+        from stable_baselines3 import PPO
+
+        torch.set_num_threads(1)
+        model = PPO.load(path, device="cpu")
+        predict = lambda obs: model.predict(obs, deterministic=True)[0]
+    env = PoolEnv(num_balls, observation_groups=observation_groups)
+    results = []
+    for seed in seeds:
+        random.seed(seed)
+        obs, _ = env.reset(seed=seed)
+        done = False
+        shots = pots = scratches = 0
+        while not done and shots < max_steps:
+            action = predict(obs)
+            obs, reward, done, truncated, _ = env.step(action)
+            shots += 1
+            for index, _, _ in env.table.logging["pocket_events"]:
+                if index == 0:
+                    scratches += 1
+                else:
+                    pots += 1
+        results.append((done, shots, pots, scratches))
+    env.close()
+    return results
+
+
+def summarize(results):
+    """Aggregates (cleared, shots, pots, scratches) per episode into the logged metrics."""
+    cleared = [shots for done, shots, _, _ in results if done]
+    total_shots = sum(shots for _, shots, _, _ in results)
+    return {
+        "eval/mean_steps_to_clear": float(np.mean(cleared)) if cleared else float("nan"),
+        "eval/clear_rate": len(cleared) / len(results),
+        "eval/pot_rate": sum(r[2] for r in results) / max(total_shots, 1),
+        "eval/scratch_rate": sum(r[3] for r in results) / max(total_shots, 1),
+    }
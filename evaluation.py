@@ -0,0 +1,161 @@
+import multiprocessing as mp
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from stable_baselines3.common.callbacks import BaseCallback
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+from episodes import init_eval_worker, run_episodes, summarize
+from numpy_policy import export_policy
+from const import OBSERVATION_GROUPS
+
+
+def split_cores(num_eval_cores):
+    """
+    Splits the cores this process may run on into (training cores, evaluation cores), taking
+    the last num_eval_cores for evaluation. Returns (all cores, None) if that leaves none to train on.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None, None
+    cores = sorted(os.sched_getaffinity(0))
+    if num_eval_cores <= 0 or len(cores) <= num_eval_cores:
+        return cores, None
+    return cores[:-num_eval_cores], cores[-num_eval_cores:]
+
+
+class PeriodicEvaluator(BaseCallback):
+    """
+    Whenever checkpoints (a BackgroundCheckpointCallback) finishes writing a checkpoint at
+    least eval_freq steps after the last evaluated one, hands it to a process pool pinned to
+    cpus that plays a fixed seeded episode set, and logs the results once they are back.
+    Training never waits for an evaluation. close() evaluates the last checkpoint written,
+    normally the final model, and waits for it.
+    """
+
+    def __init__(self, checkpoints, num_balls, eval_freq=1, num_episodes=100, num_workers=2,
+                 cpus=None, max_steps=100, seed=0, observation_groups=OBSERVATION_GROUPS, numpy_inference=False,
+                 verbose=0):
+        super().__init__(verbose)
+        self.eval_freq = eval_freq
+        self.written = queue.Queue()
+        checkpoints.listeners.append(self.checkpoint_written)
+        self.num_balls = num_balls
+        self.seeds = list(range(seed, seed + num_episodes))
+        self.num_workers = num_workers
+        self.cpus = cpus
+        self.max_steps = max_steps
+        self.observation_groups = observation_groups
+        # Export each checkpoint's actor and have the workers run it with NumPy. The export
+        # loads torch, so it runs in a fresh process of its own and the workers never import it.
+        self.numpy_inference = numpy_inference
+        self.exporter = None
+        self.pool = None
+        self.pending = None
+        self.newest = None
+        self.last_timesteps = None
+        self.history = []
+
+    def _init_callback(self):
+        if self.pool is None:
+            self.start()
+
+    def start(self):
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=init_eval_worker,
+            initargs=(self.cpus,),
+        )
+        if self.numpy_inference:
+            self.exporter = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=mp.get_context("spawn"),
+                initializer=init_eval_worker,
+                initargs=(self.cpus,),
+                max_tasks_per_child=1,
+            )
+
+    def checkpoint_written(self, path, timesteps):
+        """Called on the checkpoint writer thread once path is complete on disk."""
+        self.written.put((path, timesteps))
+
+    def take_newest(self):
+        """Returns the newest written checkpoint not yet evaluated or skipped, or None."""
+        while True:
+            try:
+                self.newest = self.written.get_nowait()
+            except queue.Empty:
+                break
+        newest, self.newest = self.newest, None
+        return newest
+
+    def submit(self, path, timesteps):
+        if self.numpy_inference:
+            export = self.exporter.submit(export_policy, path, path[:-len(".zip")] + ".npz")
+            self.pending = (path, timesteps, export, None)
+        else:
+            self.pending = (path, timesteps, None, self.play(path))
+        self.last_timesteps = timesteps
+
+    def play(self, policy_path):
+        chunks = np.array_split(self.seeds, self.num_workers)
+        return [
+            self.pool.submit(run_episodes, policy_path, self.num_balls, [int(s) for s in chunk], self.max_steps,
+                             self.observation_groups)
+            for chunk in chunks if len(chunk)
+        ]
+
+    def collect(self, wait=False):
+        if self.pending is None:
+            return
+        path, timesteps, export, futures = self.pending
+        if futures is None:
+            if not wait and not export.done():
+                return
+            futures = self.play(export.result())
+            self.pending = (path, timesteps, None, futures)
+        if not wait and not all(f.done() for f in futures):
+            return
+        self.pending = None
+        results = [r for f in futures for r in f.result()]
+        metrics = summarize(results)
+        self.history.append((path, timesteps, metrics))
+        for key, value in metrics.items():
+            self.logger.record(key, value)
+        self.logger.record("eval/checkpoint_timesteps", timesteps)
+        if self.verbose >= 1:
+            print(f"Evaluated {path}: " + ", ".join(f"{k}={v:.3f}" for k, v in metrics.items()))
+
+    def _on_step(self):
+        self.collect()
+        if self.pending is None and not self.written.empty():
+            path, timesteps = self.take_newest()
+            if self.last_timesteps is None or timesteps - self.last_timesteps >= self.eval_freq:
+                self.submit(path, timesteps)
+        return True
+
+    def _on_training_end(self):
+        self.collect(wait=True)
+        self.logger.dump(self.num_timesteps)
+
+    def close(self):
+        """Evaluates the newest checkpoint written since the last evaluation, then stops the pool."""
+        if self.pool is None:
+            return
+        self.collect(wait=True)
+        newest = self.take_newest()
+        if newest is not None:
+            self.submit(*newest)
+            self.collect(wait=True)
+            self.logger.dump(self.num_timesteps)
+        self.pool.shutdown()
+        self.pool = None
+        if self.exporter is not None:
+            self.exporter.shutdown()
+            self.exporter = None
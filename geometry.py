@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+
+from const import BALL_RADIUS, POCKETS
+
+
+POCKET_ARRAY = np.array(POCKETS, dtype=np.float64)
+
+
+def segment_blocked(seg_start, seg_end, points):
+    """
+    Vectorized version of the obstruction test in Table.is_pot_possible: True where a point
+    lies within 2*BALL_RADIUS of the segment and projects strictly inside it.
+    All arguments broadcast against each other over their leading axes.
+    """
+    seg_v = seg_end - seg_start
+    seg_len = np.hypot(seg_v[..., 0], seg_v[..., 1])
+    safe_len = np.where(seg_len > 0, seg_len, 1.0)
+    seg_dir = np.where((seg_len > 0)[..., None], seg_v / safe_len[..., None], 0.0)
+    pt_v = points - seg_start
+    proj = (pt_v * seg_dir).sum(axis=-1)
+    closest = seg_start + np.clip(proj, 0.0, seg_len)[..., None] * seg_dir
+    dist = np.hypot(points[..., 0] - closest[..., 0], points[..., 1] - closest[..., 1])
+    return (dist < 2 * BALL_RADIUS) & (proj > 0) & (proj < seg_len)
+
+
+def aim_geometry(positions, pocketed):
+    """
+    Computes aim angle and straightness for every (target ball, pocket) action.
+
+    positions is an (n, 2) array with the cue ball in row 0, pocketed an (n,) bool array.
+    Returns two arrays of length (n-1)*len(POCKETS), indexed like the env actions, matching
+    Table.calc_angle and Table.get_straightness.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    pocketed = np.asarray(pocketed, dtype=bool)
+    n = len(positions)
+    cue = positions[0]
+    targets = positions[1:, None, :]                       # (T, 1, 2)
+    pockets = POCKET_ARRAY[None, :, :]                     # (1, P, 2)
+    shape = (n - 1, len(POCKETS))
+    target_pocketed = np.broadcast_to(pocketed[1:, None], shape)
+
+    # Aim angle at the ghost ball, aiming BALL_RADIUS inside the pocket.
+    vec_tp = pockets - targets
+    dist_tp = np.hypot(vec_tp[..., 0], vec_tp[..., 1])
+    dir_tp = vec_tp / np.where(dist_tp > 0, dist_tp, 1.0)[..., None]
+    ghost = targets - dir_tp * (2 * BALL_RADIUS)
+    vec_cg = ghost - cue
+    angles = np.arctan2(vec_cg[..., 1], vec_cg[..., 0])
+    angles[(dist_tp < BALL_RADIUS) | target_pocketed] = 0.0
+
+    # Straightness of the cue-target-pocket angle.
+    vec_tc = cue - targets
+    dist_tc = np.hypot(vec_tc[..., 0], vec_tc[..., 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_theta = (vec_tc * vec_tp).sum(axis=-1) / (dist_tc * dist_tp)
+    angle_ctp = np.arccos(np.clip(cos_theta, -1.0, 1.0))
+    straightness = 2.0 * angle_ctp / math.pi - 1.0
+    min_dist = 0.1 * BALL_RADIUS
+    invalid = (
+        (dist_tc < min_dist) | (dist_tp < min_dist) | target_pocketed
+        | (straightness < 0) | (angle_ctp < math.radians(1))
+    )
+    straightness = np.where(invalid, -1.0, straightness)
+    return angles.ravel(), straightness.ravel()
+
+
+def pot_possibility(positions, pocketed):
+    """
+    Pot possibility for every (target ball, pocket) action, matching Table.is_pot_possible:
+    no other ball on the cue->target or target->pocket lines.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    pocketed = np.asarray(pocketed, dtype=bool)
+    n = len(positions)
+    cue = positions[0]
+    targets = positions[1:, None, :]                       # (T, 1, 2)
+    pockets = POCKET_ARRAY[None, :, :]                     # (1, P, 2)
+    target_pocketed = pocketed[1:, None]
+
+    others = positions[None, :, :]                         # (1, n, 2)
+    is_other = ~pocketed[None, :] & (np.arange(n)[None, :] != 0)
+    is_other = is_other & (np.arange(n)[None, :] != np.arange(1, n)[:, None])   # (T, n)
+    cue_blocked = segment_blocked(cue, positions[1:, None, :], others) & is_other
+    cue_blocked = cue_blocked.any(axis=1)                  # (T,)
+    pocket_blocked = segment_blocked(targets[:, :, None, :], pockets[:, :, None, :], others[:, None, :, :])
+    pocket_blocked = (pocket_blocked & is_other[:, None, :]).any(axis=2)   # (T, P)
+    dist_ct = np.hypot(positions[1:, 0] - cue[0], positions[1:, 1] - cue[1])
+    possible = ~(target_pocketed | (dist_ct < 1e-6)[:, None] | cue_blocked[:, None] | pocket_blocked)
+    return possible.ravel().astype(np.float64)
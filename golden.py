@@ -0,0 +1,168 @@
+import importlib
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from const import POCKETS
+from table import Table
+
+
+# Shot engines that can be checked against the golden outcomes: name -> factory(n, large_rack).
+# Any other "module:function" with the same signature can be given on the command line.
+BACKENDS = {
+    "pymunk": lambda n, large_rack: Table(n, large_rack=large_rack, fast_forward=False),
+    "fast_forward": lambda n, large_rack: Table(n, large_rack=large_rack),
+    "fast_preset": lambda n, large_rack: Table(n, large_rack=large_rack, preset="fast"),
+}
+REFERENCE_BACKEND = "pymunk"
+
+FLAGS = ("red_pocketed", "white_pocketed", "num_pocketed")
+
+# Absolute tolerances; pocketed balls, flags, rewards and done must match exactly.
+POSITION_TOL = 1e-6
+OBSERVATION_TOL = 1e-3
+
+
+def get_backend(name):
+    """Returns the factory registered as name, or imports it from a 'module:function' string."""
+    if name in BACKENDS:
+        return BACKENDS[name]
+    if ":" not in name:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {sorted(BACKENDS)} or 'module:function'")
+    module, function = name.split(":", 1)
+    return getattr(importlib.import_module(module), function)
+
+
+def make_layouts(n, count, seed=0, large_rack=False):
+    """Draws count seeded (starting positions, action) pairs with the Table's own layout generator."""
+    random.seed(seed)
+    table = Table(n, large_rack=large_rack)
+    positions = np.zeros((count, n, 2))
+    actions = np.zeros(count, dtype=np.int64)
+    for i in range(count):
+        table.reset()
+        positions[i] = [ball.body.position for ball in table.balls]
+        actions[i] = random.randrange((n - 1) * len(POCKETS))
+    table.close()
+    return positions, actions
+
+
+def play(factory, n, positions, actions, large_rack=False):
+    """
+    Plays every (layout, action) pair from a fresh reset on one table built by factory and
+    returns the outcomes plus the seconds spent in make_shot and in get_observation.
+    """
+    table = factory(n, large_rack)
+    count = len(actions)
+    outcome = {
+        "final_positions": np.zeros((count, n, 2)),
+        "pocketed": np.zeros((count, n), dtype=bool),
+        "flags": np.zeros((count, len(FLAGS)), dtype=np.int64),
+        "observations": None,
+        "rewards": np.zeros(count),
+        "done": np.zeros(count, dtype=bool),
+    }
+    shot_time = obs_time = 0.0
+    for i in range(count):
+        # Seeded per pair so anything random during the shot (e.g. respotting) repeats exactly.
+        random.seed(i)
+        table.reset()
+        for ball, pos in zip(table.balls, positions[i]):
+            ball.body.position = tuple(pos)
+        start = time.perf_counter()
+        table.make_shot(int(actions[i]))
+        shot_end = time.perf_counter()
+        observation = table.get_observation()
+        obs_time += time.perf_counter() - shot_end
+        shot_time += shot_end - start
+        if outcome["observations"] is None:
+            outcome["observations"] = np.zeros((count, len(observation)), dtype=np.float32)
+        outcome["observations"][i] = observation
+        outcome["rewards"][i] = table.get_reward()
+        outcome["done"][i] = table.is_done()
+        outcome["final_positions"][i] = [ball.body.position for ball in table.balls]
+        outcome["pocketed"][i] = [ball.pocketed for ball in table.balls]
+        outcome["flags"][i] = [table.logging[flag] for flag in FLAGS]
+    table.close()
+    return outcome, shot_time, obs_time
+
+
+def record(path, n, count, seed=0, large_rack=False):
+    """Records the golden outcomes of the reference backend to an .npz file."""
+    positions, actions = make_layouts(n, count, seed, large_rack)
+    outcome, _, _ = play(get_backend(REFERENCE_BACKEND), n, positions, actions, large_rack)
+    meta = {"n": n, "count": count, "seed": seed, "large_rack": large_rack, "backend": REFERENCE_BACKEND}
+    np.savez_compressed(path, positions=positions, actions=actions, meta=json.dumps(meta), **outcome)
+
+
+def load(path):
+    with np.load(path) as data:
+        golden = {key: data[key] for key in data.files}
+    golden["meta"] = json.loads(str(golden["meta"]))
+    return golden
+
+
+def compare(golden, outcome, position_tol=POSITION_TOL, observation_tol=OBSERVATION_TOL):
+    """Returns a dict of mismatch statistics and whether the outcome is within tolerance."""
+    position_err = np.abs(outcome["final_positions"] - golden["final_positions"]).max(axis=(1, 2))
+    observation_err = np.abs(outcome["observations"] - golden["observations"]).max(axis=1)
+    report = {
+        "max_position_err": float(position_err.max()),
+        "position_mismatches": int((position_err > position_tol).sum()),
+        "pocket_mismatches": int((outcome["pocketed"] != golden["pocketed"]).any(axis=1).sum()),
+        "flag_mismatches": int((outcome["flags"] != golden["flags"]).any(axis=1).sum()),
+        "max_observation_err": float(observation_err.max()),
+        "observation_mismatches": int((observation_err > observation_tol).sum()),
+        "reward_mismatches": int((outcome["rewards"] != golden["rewards"]).sum()),
+        "done_mismatches": int((outcome["done"] != golden["done"]).sum()),
+    }
+    report["passed"] = not any(value for key, value in report.items() if key.endswith("mismatches"))
+    return report
+
+
+def check(golden, backends):
+    """Plays the golden set with each backend; returns [(name, shot_time, obs_time, report)]."""
+    meta = golden["meta"]
+    rows = []
+    for name in backends:
+        outcome, shot_time, obs_time = play(get_backend(name), meta["n"], golden["positions"], golden["actions"],
+                                            meta["large_rack"])
+        rows.append((name, shot_time, obs_time, compare(golden, outcome)))
+    return rows
+
+
+def print_table(rows):
+    base = rows[0][1] + rows[0][2]
+    print(f"{'backend':>24} {'shot (s)':>9} {'obs (s)':>8} {'speedup':>8} {'max pos err':>12} "
+          f"{'pos':>5} {'pots':>5} {'flags':>5} {'obs':>5} {'reward':>6} {'done':>5}  result")
+    for name, shot_time, obs_time, r in rows:
+        print(f"{name:>24} {shot_time:9.2f} {obs_time:8.2f} {base / (shot_time + obs_time):7.2f}x "
+              f"{r['max_position_err']:12.2e} {r['position_mismatches']:5d} {r['pocket_mismatches']:5d} "
+              f"{r['flag_mismatches']:5d} {r['observation_mismatches']:5d} {r['reward_mismatches']:6d} "
+              f"{r['done_mismatches']:5d}  {'PASS' if r['passed'] else 'FAIL'}")
+
+
+if __name__ == "__main__":
+    usage = ("usage: python golden.py record PATH [BALLS] [COUNT] [SEED]\n"
+             "       python golden.py compare PATH [BACKEND ...]")
+    if len(sys.argv) < 3 or sys.argv[1] not in ("record", "compare"):
+        print(usage)
+        exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    if command == "record":
+        n = int(sys.argv[3]) if len(sys.argv) > 3 else 6
+        count = int(sys.argv[4]) if len(sys.argv) > 4 else 1000
+        seed = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+        start = time.perf_counter()
+        record(path, n, count, seed)
+        print(f"Recorded {count} golden shots with {n} balls to {path} in {time.perf_counter() - start:.1f} s")
+    else:
+        golden = load(path)
+        # The reference runs first so every speedup is relative to today's engine on this machine.
+        backends = [REFERENCE_BACKEND] + [b for b in (sys.argv[3:] or list(BACKENDS)) if b != REFERENCE_BACKEND]
+        meta = golden["meta"]
+        print(f"{meta['count']} golden shots with {meta['n']} balls from {path}")
+        print_table(check(golden, backends))
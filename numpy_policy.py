@@ -0,0 +1,145 @@
+import sys
+import time
+
+import numpy as np
+
+
+# NumPy versions of the torch activations an MlpPolicy can use.
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+    "ELU": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0))),
+    "LeakyReLU": lambda x: np.where(x > 0, x, 0.01 * x),
+    "Identity": lambda x: x,
+}
+
+
+def export_policy(model_path, out_path):
+    """
+    Writes the actor of a saved PPO MlpPolicy (hidden layers, activation and action head)
+    to an .npz file of plain arrays. Only the export needs torch and stable-baselines3.
+    Returns out_path.
+    """
+    from stable_baselines3 import PPO
+    from torch import nn
+
+    policy = PPO.load(model_path, device="cpu").policy
+    arrays = {}
+    activation = None
+    layers = [m for m in policy.mlp_extractor.policy_net if isinstance(m, nn.Linear)] + [policy.action_net]
+    for module in policy.mlp_extractor.policy_net:
+        if not isinstance(module, nn.Linear):
+            activation = type(module).__name__
+    if activation is not None and activation not in ACTIVATIONS:
+        raise ValueError(f"Activation {activation} has no NumPy implementation")
+    for i, layer in enumerate(layers):
+        arrays[f"weight_{i}"] = layer.weight.detach().numpy().astype(np.float64)
+        arrays[f"bias_{i}"] = layer.bias.detach().numpy().astype(np.float64)
+    np.savez(out_path, activation=activation or "Identity", num_layers=len(layers), **arrays)
+    return out_path
+
+
+class NumpyPolicy:
+    """
+    Deterministic forward pass of an exported MlpPolicy actor: argmax of the action logits,
+    for one observation or a batch. dtype is "float64", "float32" or "int8"; int8 rounds
+    each weight matrix to 8 bits per output row with a float32 scale. The rounded weights
+    are dequantized once here and the forward pass runs in float32.
+    """
+
+    def __init__(self, weights, biases, activation, dtype="float32"):
+        self.activation = ACTIVATIONS[activation]
+        self.dtype = dtype
+        compute = np.float64 if dtype == "float64" else np.float32
+        self.compute_dtype = compute
+        self.biases = [b.astype(compute) for b in biases]
+        if dtype == "int8":
+            quantized = []
+            for w in weights:
+                scale = np.abs(w).max(axis=1) / 127
+                scale[scale == 0] = 1
+                quantized.append(np.round(w / scale[:, None]).astype(np.int8) * scale.astype(np.float32)[:, None])
+            weights = quantized
+        elif dtype not in ("float32", "float64"):
+            raise ValueError(f"Unknown dtype {dtype!r}, expected 'float64', 'float32' or 'int8'")
+        # Stored transposed so the forward pass is x @ w.
+        self.weights = [np.ascontiguousarray(w.T, dtype=compute) for w in weights]
+
+    @classmethod
+    def load(cls, path, dtype="float32"):
+        with np.load(path) as data:
+            num_layers = int(data["num_layers"])
+            weights = [data[f"weight_{i}"] for i in range(num_layers)]
+            biases = [data[f"bias_{i}"] for i in range(num_layers)]
+            activation = str(data["activation"])
+        return cls(weights, biases, activation, dtype)
+
+    def logits(self, observations):
+        x = np.asarray(observations, dtype=self.compute_dtype)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w + b
+            if i < last:
+                x = self.activation(x)
+        return x
+
+    def predict(self, observations):
+        """Returns the greedy action for one observation, or an array of actions for a batch."""
+        observations = np.asarray(observations)
+        actions = self.logits(observations).argmax(axis=-1)
+        return int(actions) if observations.ndim == 1 else actions
+
+    def nbytes(self):
+        return sum(w.nbytes for w in self.weights) + sum(b.nbytes for b in self.biases)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("export", "bench"):
+        print("usage: python numpy_policy.py export MODEL.zip OUT.npz\n"
+              "       python numpy_policy.py bench MODEL.zip NUM_BALLS")
+        exit(1)
+    if sys.argv[1] == "export":
+        print(f"Exported to {export_policy(sys.argv[2], sys.argv[3])}")
+        exit()
+
+    import os
+    import random
+    import tempfile
+
+    from stable_baselines3 import PPO
+    from pool_env import PoolEnv
+
+    MODEL_PATH = sys.argv[2]
+    NUM_BALLS = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    model = PPO.load(MODEL_PATH, device="cpu")
+    npz_path = export_policy(MODEL_PATH, os.path.join(tempfile.mkdtemp(), "policy.npz"))
+
+    random.seed(0)
+    env = PoolEnv(NUM_BALLS)
+    observations = []
+    for _ in range(2000):
+        obs, _ = env.reset()
+        observations.append(obs)
+    observations = np.array(observations)
+    reference = model.predict(observations, deterministic=True)[0]
+
+    def per_call(predict, count=500):
+        start = time.perf_counter()
+        for obs in observations[:count]:
+            predict(obs)
+        return (time.perf_counter() - start) / count * 1e6
+
+    print(f"{'policy':>12} {'us/call':>8} {'us/obs batched':>15} {'agreement':>10} {'weights':>9}")
+    sb3_call = per_call(lambda obs: model.predict(obs, deterministic=True))
+    start = time.perf_counter()
+    model.predict(observations, deterministic=True)
+    sb3_batch = (time.perf_counter() - start) / len(observations) * 1e6
+    print(f"{'sb3':>12} {sb3_call:8.1f} {sb3_batch:15.2f} {1:10.2%} {'':>9}")
+    for dtype in ("float64", "float32", "int8"):
+        policy = NumpyPolicy.load(npz_path, dtype)
+        call = per_call(policy.predict)
+        start = time.perf_counter()
+        actions = policy.predict(observations)
+        batch = (time.perf_counter() - start) / len(observations) * 1e6
+        agreement = np.mean(actions == reference)
+        print(f"{dtype:>12} {call:8.1f} {batch:15.2f} {agreement:10.2%} {policy.nbytes() / 1024:7.1f}kB")
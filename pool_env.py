@@ -1,52 +1,106 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
+import os
+import resource
+import time
 import pygame
 import pymunk
 import pymunk.pygame_util
 import table
+from break_cache import BreakCache, break_key, play_break
+from const import OBSERVATION_GROUPS
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak RSS where /proc is unavailable (kilobytes on Linux, bytes on macOS).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
 
 
 class PoolEnv(gym.Env):
-    def __init__(self, n):
+    def __init__(self, n, large_rack=False, preset="default", telemetry=False, record_contacts=False,
+                 observation_groups=OBSERVATION_GROUPS, break_shot=False, break_cache=None, solver_threads=None):
         super(PoolEnv, self).__init__()
         self.num_actions = (n-1)*6
         # Define Action and Observation Spaces
         self.action_space = spaces.Discrete(self.num_actions)
-        self.table = table.Table(n)
+        self.table = table.Table(n, large_rack=large_rack or break_shot, preset=preset, record_contacts=record_contacts,
+                                 solver_threads=solver_threads)
+        # Episodes start after a break from the racked triangle. break_cache is a BreakCache or
+        # the path of its file; breaks already in it are replayed instead of simulated.
+        self.break_shot = break_shot
+        self.break_cache = None
+        if break_shot:
+            if not isinstance(break_cache, BreakCache):
+                break_cache = BreakCache(n, preset, break_cache)
+            self.break_cache = break_cache
         
         self.num_balls = n
+        # Only these feature groups are computed and concatenated into the observation.
+        self.observation_groups = self.table.observation_groups(observation_groups)
         self.observation_space = spaces.Box(
             low=-np.inf, 
             high=np.inf, 
-            shape=((1+2 + 6 + 2*(self.num_balls-1)) + 2*(self.num_balls-1) + 6*(self.num_balls-1) + 6*(self.num_balls-1) + 2*self.num_actions,), 
-            #shape = (self.num_balls-1,),
+            shape=(self.table.observation_size(self.observation_groups),),
             dtype=np.float32
         )
+        # When enabled, step() reports its timing and memory use in info["telemetry"].
+        self.telemetry = telemetry
+        self.last_step_end = None
 
     def reset(self, seed=None, options=None):
         if seed is not None:
             self.np_random, seed = gym.utils.seeding.np_random(seed)
         self.table.reset()
-        observation = self.table.get_observation()
-        return observation, {}
+        info = {}
+        if self.break_shot:
+            cached = play_break(self.table, break_key(self.table), self.break_cache)
+            info["break"] = {"cached": cached, **self.break_cache.stats()}
+        observation = self.table.get_observation(self.observation_groups)
+        return observation, info
 
     def step(self, action, render=False):
-        angle = action
-        if render:
-            self.table.make_shot_with_render(angle)
-        else:
-            self.table.make_shot(angle)
-        observation = self.table.get_observation()
+        if self.telemetry:
+            start = time.perf_counter()
+        self.shoot(action, render)
+        if self.telemetry:
+            shot_end = time.perf_counter()
+        obs_timings = {} if self.telemetry else None
+        observation = self.table.get_observation(self.observation_groups, obs_timings)
         reward = self.table.get_reward()
         done = self.table.is_done()
         truncated = False
         info = {}
         self.table.time += 1
+        if self.telemetry:
+            end = time.perf_counter()
+            info["telemetry"] = {
+                "pid": os.getpid(),
+                "shot_time": shot_end - start,
+                "obs_time": end - shot_end,
+                "obs_group_times": obs_timings,
+                "idle_time": start - self.last_step_end if self.last_step_end is not None else 0.0,
+                "rss": current_rss(),
+            }
+            self.last_step_end = end
         
         return observation, reward, done, truncated, info
     
+    def shoot(self, action, render=False):
+        """Plays the shot for action on the table."""
+        if render:
+            self.table.make_shot_with_render(action)
+        else:
+            self.table.make_shot(action)
+
     def close(self):
+        if self.break_cache is not None:
+            self.break_cache.save()
         self.table.close()
 
 # Register the environment
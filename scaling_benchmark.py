@@ -0,0 +1,60 @@
+import random
+import sys
+import time
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from table import Table
+
+
+def measure(n, large_rack, shots, seed=0):
+    """Returns mean seconds per make_shot and per get_observation for n balls."""
+    random.seed(seed)
+    table = Table(n, large_rack=large_rack)
+    num_actions = (n - 1) * 6
+    shot_times = []
+    obs_times = []
+    for i in range(shots):
+        if i % 5 == 0 or table.is_done():
+            table.reset()
+        start = time.perf_counter()
+        table.get_observation()
+        obs_times.append(time.perf_counter() - start)
+        action = random.randrange(num_actions)
+        start = time.perf_counter()
+        table.make_shot(action)
+        shot_times.append(time.perf_counter() - start)
+    table.close()
+    return np.mean(shot_times), np.mean(obs_times)
+
+
+if __name__ == "__main__":
+    OUTPUT = sys.argv[1] if len(sys.argv) > 1 else "scaling_benchmark.png"
+    SHOTS = 20
+    BALL_COUNTS = [2, 4, 6, 10, 15, 20, 30, 40, 50]
+
+    results = {}
+    for large_rack in (False, True):
+        label = "large rack" if large_rack else "random layout"
+        counts = [n for n in BALL_COUNTS if not large_rack or n >= 15]
+        results[label] = (counts, [measure(n, large_rack, SHOTS) for n in counts])
+        for n, (shot, obs) in zip(*results[label]):
+            print(f"{label:>14} n={n:3d}  shot {shot * 1000:8.2f} ms  observation {obs * 1000:6.3f} ms")
+
+    fig, (ax_shot, ax_obs) = plt.subplots(1, 2, figsize=(12, 4.5))
+    for label, (counts, times) in results.items():
+        ax_shot.plot(counts, [t[0] * 1000 for t in times], marker="o", label=label)
+        ax_obs.plot(counts, [t[1] * 1000 for t in times], marker="o", label=label)
+    ax_shot.set_title("make_shot")
+    ax_obs.set_title("get_observation")
+    for ax in (ax_shot, ax_obs):
+        ax.set_xlabel("balls")
+        ax.set_ylabel("ms")
+        ax.grid(True)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(OUTPUT)
+    print(f"Saved plot to: {OUTPUT}")
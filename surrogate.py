@@ -0,0 +1,260 @@
+import random
+import sys
+
+import numpy as np
+import torch
+from torch import nn
+
+try:
+    from stable_baselines3.common.callbacks import BaseCallback
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+from const import HEIGHT, OBSERVATION_GROUPS, WIDTH
+from pool_env import PoolEnv
+from table import clamp_into_field
+
+SCALE = np.array([WIDTH, HEIGHT], dtype=np.float32)
+
+
+def table_state(table):
+    """Returns (positions, pocketed) of the balls on a Table."""
+    positions = np.array([ball.body.position for ball in table.balls], dtype=np.float32)
+    pocketed = np.array([ball.pocketed for ball in table.balls], dtype=bool)
+    return positions, pocketed
+
+
+def shot_outcome(table):
+    """Returns (positions, pocketed) right after make_shot; a scratched cue counts as pocketed."""
+    positions, pocketed = table_state(table)
+    for index, _, _ in table.logging["pocket_events"]:
+        pocketed[index] = True
+    return positions, pocketed
+
+
+class TransitionBuffer:
+    """Ring buffer of (observation, positions, pocketed, action) -> (next positions, next pocketed)."""
+
+    def __init__(self, obs_dim, num_balls, capacity=50000):
+        self.obs = np.zeros((capacity, obs_dim), dtype=np.float32)
+        self.positions = np.zeros((capacity, num_balls, 2), dtype=np.float32)
+        self.pocketed = np.zeros((capacity, num_balls), dtype=bool)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.next_positions = np.zeros((capacity, num_balls, 2), dtype=np.float32)
+        self.next_pocketed = np.zeros((capacity, num_balls), dtype=bool)
+        self.capacity = capacity
+        self.size = 0
+        self.pos = 0
+
+    def add(self, obs, positions, pocketed, action, next_positions, next_pocketed):
+        i = self.pos
+        self.obs[i], self.positions[i], self.pocketed[i], self.actions[i] = obs, positions, pocketed, action
+        self.next_positions[i], self.next_pocketed[i] = next_positions, next_pocketed
+        self.pos = (self.pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def arrays(self):
+        n = self.size
+        return (self.obs[:n], self.positions[:n], self.pocketed[:n], self.actions[:n],
+                self.next_positions[:n], self.next_pocketed[:n])
+
+
+class Surrogate(nn.Module):
+    """
+    Small MLP that predicts where a shot leaves the balls: the displacement of every ball and
+    whether it gets pocketed, from the observation, the ball positions and the action. The
+    next observation, reward and done then come from the Table itself (apply_outcome).
+    """
+
+    def __init__(self, obs_dim, num_balls, num_actions, hidden=128):
+        super().__init__()
+        self.num_balls = num_balls
+        self.num_actions = num_actions
+        self.net = nn.Sequential(
+            nn.Linear(obs_dim + 3 * num_balls + num_actions, hidden), nn.Tanh(),
+            nn.Linear(hidden, hidden), nn.Tanh(),
+            nn.Linear(hidden, 3 * num_balls),
+        )
+        self.register_buffer("obs_mean", torch.zeros(obs_dim))
+        self.register_buffer("obs_std", torch.ones(obs_dim))
+
+    def features(self, obs, positions, pocketed, actions):
+        obs = (torch.as_tensor(obs) - self.obs_mean) / self.obs_std
+        positions = torch.as_tensor(positions / SCALE).flatten(1)
+        pocketed = torch.as_tensor(pocketed, dtype=torch.float32)
+        one_hot = nn.functional.one_hot(torch.as_tensor(actions), self.num_actions).float()
+        return torch.cat([obs, positions, pocketed, one_hot], dim=1)
+
+    def forward(self, obs, positions, pocketed, actions):
+        out = self.net(self.features(obs, positions, pocketed, actions))
+        return out[:, :2 * self.num_balls].reshape(-1, self.num_balls, 2), out[:, 2 * self.num_balls:]
+
+    def fit(self, buffer, steps=200, batch_size=256, lr=1e-3):
+        """Trains on the buffer; returns the last batch loss."""
+        obs, positions, pocketed, actions, next_positions, next_pocketed = buffer.arrays()
+        self.obs_mean.copy_(torch.as_tensor(obs.mean(axis=0)))
+        self.obs_std.copy_(torch.as_tensor(obs.std(axis=0) + 1e-6))
+        optimizer = torch.optim.Adam(self.parameters(), lr=lr)
+        # Displacements are only defined for balls that stay on the table; a scratched cue is respotted.
+        on_table = ~pocketed & ~next_pocketed
+        delta = np.where(on_table[..., None], (next_positions - positions) / SCALE, 0.0).astype(np.float32)
+        loss = torch.tensor(0.0)
+        for _ in range(steps):
+            idx = np.random.randint(0, len(actions), min(batch_size, len(actions)))
+            pred_delta, logits = self(obs[idx], positions[idx], pocketed[idx], actions[idx])
+            mask = torch.as_tensor(on_table[idx], dtype=torch.float32)
+            position_loss = (((pred_delta - torch.as_tensor(delta[idx])) ** 2).sum(-1) * mask).sum() / mask.sum().clamp(min=1)
+            live = torch.as_tensor(~pocketed[idx], dtype=torch.float32)
+            pocket_loss = (nn.functional.binary_cross_entropy_with_logits(
+                logits, torch.as_tensor(next_pocketed[idx], dtype=torch.float32), reduction="none") * live).sum() / live.sum()
+            loss = position_loss * 100 + pocket_loss
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+        return loss.item()
+
+    @torch.no_grad()
+    def predict(self, obs, positions, pocketed, action):
+        """Returns the predicted (positions, pocketed) after one shot from a single state."""
+        delta, logits = self(obs[None], positions[None], pocketed[None], np.array([action]))
+        next_positions = clamp_into_field(positions + delta[0].numpy() * SCALE).astype(np.float32)
+        next_pocketed = pocketed | (logits[0].numpy() > 0)
+        return next_positions, next_pocketed
+
+
+def outcome_accuracy(predicted, real):
+    """Returns (same balls pocketed, mean position error in px of balls both keep on the table)."""
+    (pred_positions, pred_pocketed), (positions, pocketed) = predicted, real
+    same = bool((pred_pocketed == pocketed).all())
+    on_table = ~pred_pocketed & ~pocketed
+    error = float(np.linalg.norm(pred_positions[on_table] - positions[on_table], axis=1).mean()) if on_table.any() else 0.0
+    return same, error
+
+
+class DynaEnv(PoolEnv):
+    """
+    PoolEnv that learns a Surrogate from its own real shots and, once warmed up, answers a
+    fraction imagine_ratio of the shots with the surrogate instead of pymunk. The imagined
+    outcome is applied to the real Table (kept inside FIELD, overlapping balls pushed apart),
+    so observations, rewards and done are computed exactly as for a simulated shot. Every check_every imagined shots, the same shot is also
+    simulated on a spare Table to measure the surrogate's accuracy.
+    """
+
+    def __init__(self, n, imagine_ratio=0.5, warmup=2000, retrain_every=1000, check_every=20, seed=0,
+                 observation_groups=OBSERVATION_GROUPS, **kwargs):
+        super().__init__(n, observation_groups=observation_groups, **kwargs)
+        torch.set_num_threads(1)
+        torch.manual_seed(seed)
+        self.rng = random.Random(seed)
+        self.imagine_ratio = imagine_ratio
+        self.warmup = warmup
+        self.retrain_every = retrain_every
+        self.check_every = check_every
+        obs_dim = self.observation_space.shape[0]
+        self.surrogate = Surrogate(obs_dim, n, self.num_actions)
+        self.buffer = TransitionBuffer(obs_dim, n)
+        # Same physics as the env; its layouts and respots come from self.rng, not the global random.
+        self.checker = type(self.table)(n, preset=kwargs.get("preset", "default"), rng=self.rng)
+        self.trained = False
+        self.last_obs = None
+        self.last_imagined = False
+        self.stats = {"real_shots": 0, "imagined_shots": 0, "checks": 0, "check_pots_agree": 0,
+                      "check_position_error": 0.0, "fit_loss": float("nan")}
+
+    def reset(self, seed=None, options=None):
+        observation, info = super().reset(seed=seed, options=options)
+        self.last_obs = observation
+        return observation, info
+
+    def shoot(self, action, render=False):
+        positions, pocketed = table_state(self.table)
+        if render or not self.trained or self.rng.random() >= self.imagine_ratio:
+            super().shoot(action, render)
+            self.last_imagined = False
+            self.stats["real_shots"] += 1
+            self.buffer.add(self.last_obs, positions, pocketed, action, *shot_outcome(self.table))
+            real = self.stats["real_shots"]
+            if real == self.warmup or real > self.warmup and real % self.retrain_every == 0:
+                self.stats["fit_loss"] = self.surrogate.fit(self.buffer)
+                self.trained = True
+            return
+        predicted = self.surrogate.predict(self.last_obs, positions, pocketed, action)
+        self.last_imagined = True
+        self.stats["imagined_shots"] += 1
+        if self.stats["imagined_shots"] % self.check_every == 0:
+            self.check(positions, pocketed, action, predicted)
+        self.table.apply_outcome(*predicted)
+
+    def check(self, positions, pocketed, action, predicted):
+        """Simulates the imagined shot on the spare table and records how close the surrogate was."""
+        self.checker.reset()
+        self.checker.apply_outcome(positions, pocketed)
+        self.checker.make_shot(action)
+        same, error = outcome_accuracy(predicted, shot_outcome(self.checker))
+        self.stats["checks"] += 1
+        self.stats["check_pots_agree"] += same
+        self.stats["check_position_error"] += error
+
+    def step(self, action, render=False):
+        observation, reward, done, truncated, info = super().step(action, render)
+        self.last_obs = observation
+        info["dyna"] = {"imagined": self.last_imagined, **self.stats}
+        return observation, reward, done, truncated, info
+
+
+class DynaCallback(BaseCallback):
+    """Logs the share of imagined shots and the surrogate's checked accuracy once per rollout."""
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        stats = [info["dyna"] for info in self.locals.get("infos", []) if "dyna" in info]
+        if not stats:
+            return
+        real = sum(s["real_shots"] for s in stats)
+        imagined = sum(s["imagined_shots"] for s in stats)
+        checks = sum(s["checks"] for s in stats)
+        self.logger.record("dyna/real_shots", real)
+        self.logger.record("dyna/imagined_fraction", imagined / max(real + imagined, 1))
+        if checks:
+            self.logger.record("dyna/check_pot_agreement", sum(s["check_pots_agree"] for s in stats) / checks)
+            self.logger.record("dyna/check_position_error_px", sum(s["check_position_error"] for s in stats) / checks)
+
+
+def collect(num_balls, count, seed=0):
+    """Plays count random real shots and returns their TransitionBuffer."""
+    random.seed(seed)
+    env = PoolEnv(num_balls)
+    buffer = TransitionBuffer(env.observation_space.shape[0], num_balls, capacity=count)
+    obs, _ = env.reset()
+    for _ in range(count):
+        positions, pocketed = table_state(env.table)
+        action = random.randrange(env.num_actions)
+        next_obs, _, done, _, _ = env.step(action)
+        buffer.add(obs, positions, pocketed, action, *shot_outcome(env.table))
+        obs = env.reset()[0] if done else next_obs
+    env.close()
+    return buffer
+
+
+if __name__ == "__main__":
+    NUM_BALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    NUM_SHOTS = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    train_set = collect(NUM_BALLS, NUM_SHOTS, seed=0)
+    test_set = collect(NUM_BALLS, 1000, seed=1)
+    torch.manual_seed(0)
+    obs_dim = train_set.obs.shape[1]
+    model = Surrogate(obs_dim, NUM_BALLS, (NUM_BALLS - 1) * 6)
+    loss = model.fit(train_set, steps=3000)
+    agree = errors = 0
+    obs, positions, pocketed, actions, next_positions, next_pocketed = test_set.arrays()
+    for i in range(len(actions)):
+        same, error = outcome_accuracy(model.predict(obs[i], positions[i], pocketed[i], actions[i]),
+                                       (next_positions[i], next_pocketed[i]))
+        agree += same
+        errors += error
+    print(f"{NUM_SHOTS} training shots, {NUM_BALLS} balls: final loss {loss:.4f}")
+    print(f"held-out pot agreement {agree / len(actions):.1%}, mean position error {errors / len(actions):.1f}px")
@@ -0,0 +1,304 @@
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+# Trial settings not given by the spec fall back to these (the train.py defaults).
+DEFAULT_CONFIG = {
+    "num_balls": 4,
+    "num_cpu": 4,
+    "learner_cpus": 1,
+    "total_timesteps": 200000,
+    "eval_episodes": 100,
+    "eval_max_steps": 100,
+    "seed": 0,
+    "n_steps": 2048,
+    "batch_size": 64,
+    "n_epochs": 10,
+    "gamma": 0.99,
+    "gae_lambda": 0.95,
+    "clip_range": 0.2,
+    "ent_coef": 0.0,
+    "learning_rate": 3e-4,
+}
+PPO_PARAMS = ("n_steps", "batch_size", "n_epochs", "gamma", "gae_lambda", "clip_range", "ent_coef", "learning_rate")
+
+POLL_INTERVAL = 1.0
+
+
+def sample_value(rng, space):
+    """Draws one value from a random-search space: a list (choice) or {"uniform"/"log_uniform"/"int": [lo, hi]}."""
+    if isinstance(space, list):
+        return space[rng.randrange(len(space))]
+    (kind, (low, high)), = space.items()
+    if kind == "uniform":
+        return rng.uniform(low, high)
+    if kind == "log_uniform":
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    if kind == "int":
+        return rng.randint(low, high)
+    raise ValueError(f"Unknown search space {kind!r}")
+
+
+def expand_spec(spec):
+    """
+    Returns the trial configs of a sweep spec:
+    {"method": "grid" | "random", "base": {...}, "params": {name: values or space},
+     "num_trials": N (random only), "seed": S (random only)}.
+    """
+    base = dict(DEFAULT_CONFIG, **spec.get("base", {}))
+    params = spec.get("params", {})
+    unknown = set(base) - set(DEFAULT_CONFIG) | set(params) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown trial settings {sorted(unknown)}")
+    method = spec.get("method", "grid")
+    if method == "grid":
+        names = list(params)
+        return [dict(base, **dict(zip(names, values))) for values in itertools.product(*(params[n] for n in names))]
+    if method == "random":
+        rng = random.Random(spec.get("seed", 0))
+        return [dict(base, **{name: sample_value(rng, space) for name, space in params.items()})
+                for _ in range(spec["num_trials"])]
+    raise ValueError(f"Unknown sweep method {method!r}")
+
+
+def cpus_needed(config, total):
+    """One core per env worker plus the learner's; a single env runs inside the learner."""
+    need = config["learner_cpus"] + (config["num_cpu"] if config["num_cpu"] > 1 else 0)
+    return min(need, total)
+
+
+class CpuPool:
+    """Hands out disjoint sets of cores so concurrent trials never share one."""
+
+    def __init__(self, cpus):
+        self.free = sorted(cpus)
+
+    def take(self, count):
+        if count > len(self.free):
+            return None
+        taken, self.free = self.free[:count], self.free[count:]
+        return taken
+
+    def give(self, cpus):
+        self.free = sorted(self.free + list(cpus))
+
+
+def trial_dir(sweep_dir, index):
+    return os.path.join(sweep_dir, f"trial_{index:03d}")
+
+
+def prepare(spec, sweep_dir):
+    """Writes the trial configs once; a resumed sweep reuses them so random draws do not change."""
+    os.makedirs(sweep_dir, exist_ok=True)
+    path = os.path.join(sweep_dir, "trials.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    configs = expand_spec(spec)
+    for i, config in enumerate(configs):
+        os.makedirs(trial_dir(sweep_dir, i), exist_ok=True)
+        with open(os.path.join(trial_dir(sweep_dir, i), "config.json"), "w") as f:
+            json.dump(config, f, indent=2)
+    with open(path + ".tmp", "w") as f:
+        json.dump(configs, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return configs
+
+
+def load_result(sweep_dir, index):
+    path = os.path.join(trial_dir(sweep_dir, index), "result.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_sweep(spec, sweep_dir, cpus=None, verbose=1):
+    """
+    Runs every trial of spec that has no result yet, as many at once as the cores allow,
+    each in its own process pinned to its own cores. Returns the summary rows.
+    """
+    configs = prepare(spec, sweep_dir)
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    pool = CpuPool(cpus)
+    queue = [i for i in range(len(configs)) if load_result(sweep_dir, i) is None]
+    if verbose and len(queue) < len(configs):
+        print(f"Resuming sweep: {len(configs) - len(queue)} of {len(configs)} trials already done.")
+    running = {}
+    try:
+        while queue or running:
+            # Start queued trials in order while their cores are free.
+            while queue:
+                index = queue[0]
+                taken = pool.take(cpus_needed(configs[index], len(cpus)))
+                if taken is None:
+                    break
+                queue.pop(0)
+                directory = trial_dir(sweep_dir, index)
+                log = open(os.path.join(directory, "trial.log"), "a")
+                command = [sys.executable, os.path.abspath(__file__), "--trial", directory, ",".join(map(str, taken))]
+                running[index] = (subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), taken, log)
+                if verbose:
+                    print(f"Started trial {index} on cores {taken}")
+            time.sleep(POLL_INTERVAL)
+            for index, (process, taken, log) in list(running.items()):
+                if process.poll() is None:
+                    continue
+                del running[index]
+                log.close()
+                pool.give(taken)
+                if verbose:
+                    status = "done" if process.returncode == 0 else f"failed ({process.returncode})"
+                    print(f"Trial {index} {status}")
+    finally:
+        for process, _, log in running.values():
+            process.terminate()
+            process.wait()
+            log.close()
+    return write_summary(sweep_dir, configs)
+
+
+def write_summary(sweep_dir, configs):
+    """Writes summary.csv with each trial's swept settings, final metrics and throughput."""
+    varying = [name for name in DEFAULT_CONFIG if len({json.dumps(c[name]) for c in configs}) > 1]
+    rows = []
+    for i, config in enumerate(configs):
+        row = {"trial": i}
+        row.update({name: config[name] for name in varying})
+        result = load_result(sweep_dir, i)
+        row["status"] = "done" if result else "pending"
+        if result:
+            row.update(result)
+        rows.append(row)
+    columns = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+    with open(os.path.join(sweep_dir, "summary.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def print_summary(rows):
+    columns = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+    cells = [[format_cell(row.get(column, "")) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(cell[i]) for cell in cells)) for i, column in enumerate(columns)]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for cell in cells:
+        print("  ".join(value.rjust(width) for value, width in zip(cell, widths)))
+
+
+def format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def pinned_env(num_balls, cpu, log_dir, rank):
+    """Env factory for a SubprocVecEnv worker that pins itself to one core."""
+    def _init():
+        import torch
+        from stable_baselines3.common.monitor import Monitor
+        from pool_env import PoolEnv
+
+        torch.set_num_threads(1)
+        if cpu is not None and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, {cpu})
+        return Monitor(PoolEnv(num_balls), filename=os.path.join(log_dir, f"monitor_{rank}"))
+    return _init
+
+
+def run_trial(directory, cpus):
+    """Trains and evaluates one trial in this process, resuming from its newest checkpoint."""
+    import torch
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+    from checkpointing import BackgroundCheckpointCallback, latest_checkpoint
+    from episodes import run_episodes, summarize
+
+    with open(os.path.join(directory, "config.json")) as f:
+        config = json.load(f)
+    num_cpu = config["num_cpu"]
+    learner_cpus = cpus[:config["learner_cpus"]] if len(cpus) > config["learner_cpus"] else cpus
+    worker_cpus = cpus[len(learner_cpus):] or [None]
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, learner_cpus)
+    torch.set_num_threads(len(learner_cpus))
+
+    env_fns = [pinned_env(config["num_balls"], worker_cpus[i % len(worker_cpus)], directory, i) for i in range(num_cpu)]
+    if num_cpu > 1:
+        vec_env = SubprocVecEnv(env_fns)
+    else:
+        vec_env = DummyVecEnv(env_fns)
+    name = "model"
+    resume_path = latest_checkpoint(directory, name)
+    if resume_path is not None:
+        model = PPO.load(resume_path, env=vec_env, device="cpu", tensorboard_log=directory)
+    else:
+        model = PPO("MlpPolicy", vec_env, seed=config["seed"], device="cpu", tensorboard_log=directory,
+                    **{key: config[key] for key in PPO_PARAMS})
+    checkpoint = BackgroundCheckpointCallback(
+        save_freq=max(config["total_timesteps"] // 10 // num_cpu, 1), save_path=directory, name_prefix=name)
+    start_steps = model.num_timesteps
+    start = time.perf_counter()
+    try:
+        model.learn(max(config["total_timesteps"] - model.num_timesteps, 0), callback=checkpoint,
+                    tb_log_name="ppo", reset_num_timesteps=resume_path is None)
+        train_time = time.perf_counter() - start
+        final_path = os.path.join(directory, "final.zip")
+        checkpoint.save_now(final_path, model)
+    finally:
+        vec_env.close()
+        checkpoint.close()
+
+    seeds = list(range(10000, 10000 + config["eval_episodes"]))
+    metrics = summarize(run_episodes(final_path, config["num_balls"], seeds, config["eval_max_steps"]))
+    rewards = [info["r"] for info in model.ep_info_buffer]
+    result = {
+        "ep_rew_mean": float(np.mean(rewards)) if rewards else float("nan"),
+        **{key.split("/", 1)[1]: value for key, value in metrics.items()},
+        "steps_per_sec": (model.num_timesteps - start_steps) / train_time if train_time > 0 else float("nan"),
+        "train_time": train_time,
+        "cpus": ",".join(map(str, cpus)),
+    }
+    with open(os.path.join(directory, "result.json.tmp"), "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(os.path.join(directory, "result.json.tmp"), os.path.join(directory, "result.json"))
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--trial":
+        run_trial(sys.argv[2], [int(c) for c in sys.argv[3].split(",")])
+        exit()
+    if len(sys.argv) < 3:
+        print("usage: python sweep.py SPEC.json SWEEP_DIR [CPUS, e.g. 0-7 or 0,2,4]")
+        exit(1)
+    with open(sys.argv[1]) as f:
+        SPEC = json.load(f)
+    CPUS = None
+    if len(sys.argv) > 3:
+        CPUS = []
+        for part in sys.argv[3].split(","):
+            low, _, high = part.partition("-")
+            CPUS.extend(range(int(low), int(high or low) + 1))
+    try:
+        ROWS = run_sweep(SPEC, sys.argv[2], CPUS)
+    except KeyboardInterrupt:
+        print("Sweep interrupted; run the same command again to resume.")
+        ROWS = write_summary(sys.argv[2], prepare(SPEC, sys.argv[2]))
+    print_summary(ROWS)
@@ -0,0 +1,182 @@
+import numpy as np
+import torch
+
+try:
+    from stable_baselines3.common.buffers import RolloutBuffer
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+from const import HEIGHT, OBSERVATION_GROUPS, POCKETS, WIDTH
+from table import Table, observation_sizes
+
+
+# Mirror name -> (flip x, flip y). The table and POCKETS are symmetric under all three.
+MIRRORS = {"x": (True, False), "y": (False, True), "xy": (True, True)}
+
+
+def pocket_permutation(mirror):
+    """perm[i] is the index of the pocket that pocket i lands on under the mirror."""
+    flip_x, flip_y = MIRRORS[mirror]
+    perm = []
+    for x, y in POCKETS:
+        perm.append(POCKETS.index((WIDTH - x if flip_x else x, HEIGHT - y if flip_y else y)))
+    return np.array(perm)
+
+
+def mirror_actions(actions, mirror):
+    """Maps ball*6 + pocket actions onto the same target ball and the mirrored pocket."""
+    actions = np.asarray(actions)
+    num_pockets = len(POCKETS)
+    return actions // num_pockets * num_pockets + pocket_permutation(mirror)[actions % num_pockets]
+
+
+class ObservationMirror:
+    """
+    Maps observations of a table onto the observations get_observation returns for the
+    mirrored table: coordinates are reflected, angles reflected, per-pocket features moved
+    to the mirrored pocket; distances, time, straightness and possibility values are kept.
+    Pocketed balls keep their -100/-1 placeholders.
+    """
+
+    def __init__(self, num_balls, observation_groups=OBSERVATION_GROUPS):
+        targets = num_balls - 1
+        num_pockets = len(POCKETS)
+        sizes = observation_sizes(num_balls)
+        groups = Table.observation_groups(observation_groups)
+        self.size = sum(sizes[group] for group in groups)
+        offsets = {}
+        start = 0
+        for group in groups:
+            offsets[group] = start
+            start += sizes[group]
+
+        # Blocks of len(POCKETS) columns indexed by pocket.
+        self.pocket_cols = []
+        # (column, column whose -100 marks a pocketed ball, or -1 if never pocketed)
+        self.x_cols = []
+        self.y_cols = []
+        # (column, mask column, value in the mask column that marks a placeholder angle)
+        self.angle_cols = []
+        if "cue" in offsets:
+            o = offsets["cue"]
+            self.x_cols.append((o, -1))
+            self.y_cols.append((o + 1, -1))
+            self.pocket_cols.append(np.arange(o + 2, o + 2 + num_pockets))
+            dists = o + 2 + num_pockets
+            for j in range(targets):
+                self.angle_cols.append((dists + targets + j, dists + j, -1))
+        if "balls" in offsets:
+            for j in range(targets):
+                o = offsets["balls"] + j * (2 + 2 * num_pockets)
+                self.x_cols.append((o, o))
+                self.y_cols.append((o + 1, o))
+                self.pocket_cols.append(np.arange(o + 2, o + 2 + num_pockets))
+                angles = np.arange(o + 2 + num_pockets, o + 2 + 2 * num_pockets)
+                self.pocket_cols.append(angles)
+                self.angle_cols.extend((col, o, -100) for col in angles)
+        for group in ("straightness", "possibility"):
+            if group in offsets:
+                for j in range(targets):
+                    o = offsets[group] + j * num_pockets
+                    self.pocket_cols.append(np.arange(o, o + num_pockets))
+
+        # Source column of every output column, per mirror.
+        self.index = {}
+        for mirror in MIRRORS:
+            perm = pocket_permutation(mirror)
+            index = np.arange(self.size)
+            for cols in self.pocket_cols:
+                index[cols[perm]] = cols
+            self.index[mirror] = index
+
+    def __call__(self, observations, mirror):
+        """Mirrors an (..., size) array of observations."""
+        flip_x, flip_y = MIRRORS[mirror]
+        observations = np.asarray(observations)
+        out = observations[..., self.index[mirror]].astype(np.float64)
+        if flip_x:
+            for col, mask_col in self.x_cols:
+                keep = observations[..., mask_col] == -100 if mask_col >= 0 else False
+                out[..., col] = np.where(keep, out[..., col], WIDTH - out[..., col])
+        if flip_y:
+            for col, mask_col in self.y_cols:
+                keep = observations[..., mask_col] == -100 if mask_col >= 0 else False
+                out[..., col] = np.where(keep, out[..., col], HEIGHT - out[..., col])
+        sx = -1.0 if flip_x else 1.0
+        sy = -1.0 if flip_y else 1.0
+        for col, mask_col, mask_value in self.angle_cols:
+            angle = out[..., col]
+            mirrored = np.arctan2(sy * np.sin(angle), sx * np.cos(angle))
+            out[..., col] = np.where(observations[..., mask_col] == mask_value, angle, mirrored)
+        return out.astype(observations.dtype)
+
+
+class SymmetricRolloutBuffer(RolloutBuffer):
+    """
+    RolloutBuffer that, once returns and advantages are computed, appends a mirrored copy
+    of the rollout for each entry of mirrors as extra envs. Mirrored transitions keep the
+    rewards, returns and advantages of the original; their values and log-probabilities
+    are re-evaluated under the current policy, which has to be set as buffer.policy.
+    """
+
+    def __init__(self, *args, num_balls, observation_groups=OBSERVATION_GROUPS, mirrors=tuple(MIRRORS), **kwargs):
+        self.base_n_envs = kwargs.get("n_envs", 1)
+        super().__init__(*args, **kwargs)
+        self.mirror = ObservationMirror(num_balls, observation_groups)
+        self.mirrors = mirrors
+        self.policy = None
+
+    def reset(self):
+        self.n_envs = self.base_n_envs
+        super().reset()
+
+    def compute_returns_and_advantage(self, last_values, dones):
+        super().compute_returns_and_advantage(last_values, dones)
+        if self.policy is not None and self.mirrors:
+            self.augment()
+
+    def augment(self):
+        observations = [self.observations]
+        actions = [self.actions]
+        values = [self.values]
+        log_probs = [self.log_probs]
+        for mirror in self.mirrors:
+            obs = self.mirror(self.observations, mirror)
+            act = mirror_actions(self.actions.astype(np.int64), mirror).astype(self.actions.dtype)
+            with torch.no_grad():
+                value, log_prob, _ = self.policy.evaluate_actions(
+                    torch.as_tensor(obs.reshape(-1, *self.obs_shape), device=self.policy.device),
+                    torch.as_tensor(act.reshape(-1), device=self.policy.device),
+                )
+            observations.append(obs)
+            actions.append(act)
+            values.append(value.cpu().numpy().reshape(self.values.shape))
+            log_probs.append(log_prob.cpu().numpy().reshape(self.log_probs.shape))
+        copies = 1 + len(self.mirrors)
+        self.observations = np.concatenate(observations, axis=1)
+        self.actions = np.concatenate(actions, axis=1)
+        self.values = np.concatenate(values, axis=1)
+        self.log_probs = np.concatenate(log_probs, axis=1)
+        for name in ("rewards", "returns", "advantages", "episode_starts"):
+            setattr(self, name, np.tile(getattr(self, name), (1, copies)))
+        self.n_envs = self.base_n_envs * copies
+
+
+def enable_symmetry(model, num_balls, observation_groups=OBSERVATION_GROUPS, mirrors=tuple(MIRRORS)):
+    """Swaps the rollout buffer of an on-policy model for a SymmetricRolloutBuffer."""
+    buffer = model.rollout_buffer
+    model.rollout_buffer = SymmetricRolloutBuffer(
+        buffer.buffer_size,
+        buffer.observation_space,
+        buffer.action_space,
+        device=buffer.device,
+        gae_lambda=buffer.gae_lambda,
+        gamma=buffer.gamma,
+        n_envs=buffer.n_envs,
+        num_balls=num_balls,
+        observation_groups=observation_groups,
+        mirrors=mirrors,
+    )
+    model.rollout_buffer.policy = model.policy
+    return model
@@ -5,7 +5,10 @@ import math
 import numpy as np
 import pymunk.util
 from const import *
+from geometry import aim_geometry, pot_possibility
+import os
 import random
+import sys
 import time
 
 from pymunk import Vec2d
@@ -30,6 +33,76 @@ def point_to_segment_distance(seg_start, seg_end, point):
     return (point - closest).length
 
 
+def segment_distance(a0, a1, b0, b1):
+    """Returns the shortest distance between segments a0-a1 and b0-b1."""
+    def orientation(p, q, r):
+        return (q - p).cross(r - p)
+
+    d1 = orientation(b0, b1, a0)
+    d2 = orientation(b0, b1, a1)
+    d3 = orientation(a0, a1, b0)
+    d4 = orientation(a0, a1, b1)
+    if ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0)) and d1 * d2 < 0 and d3 * d4 < 0:
+        return 0.0
+    return min(
+        point_to_segment_distance(b0, b1, a0),
+        point_to_segment_distance(b0, b1, a1),
+        point_to_segment_distance(a0, a1, b0),
+        point_to_segment_distance(a0, a1, b1),
+    )
+
+
+def clamp_into_field(positions, margin=BALL_RADIUS):
+    """Moves each of an (n, 2) array of points at least margin inside the convex FIELD polygon."""
+    positions = np.array(positions, dtype=np.float64)
+    edges = list(zip(FIELD, FIELD[1:] + FIELD[:1]))
+    # Pushing off one edge can cross a neighbouring one near a corner; a second pass settles it.
+    for _ in range(2):
+        for (x0, y0), (x1, y1) in edges:
+            inward = np.array([y0 - y1, x1 - x0]) / math.hypot(x1 - x0, y1 - y0)
+            depth = (positions - (x0, y0)) @ inward
+            positions += np.maximum(margin - depth, 0)[:, None] * inward
+    return positions
+
+
+def separate_balls(positions, on_table, tolerance=OVERLAP_TOLERANCE, iterations=SEPARATION_ITERATIONS):
+    """
+    Pushes apart balls of an (n, 2) array that overlap by more than tolerance, keeping the
+    moved ones inside FIELD. Balls that do not overlap are left exactly where they are.
+    """
+    positions = np.array(positions, dtype=np.float64)
+    index = np.flatnonzero(on_table)
+    for _ in range(iterations):
+        moved = np.zeros(len(positions), dtype=bool)
+        for k, i in enumerate(index):
+            for j in index[k + 1:]:
+                offset = positions[j] - positions[i]
+                distance = math.hypot(*offset)
+                overlap = 2 * BALL_RADIUS - distance
+                if overlap <= tolerance:
+                    continue
+                direction = offset / distance if distance > 1e-9 else np.array([1.0, 0.0])
+                positions[i] -= direction * overlap / 2
+                positions[j] += direction * overlap / 2
+                moved[i] = moved[j] = True
+        if not moved.any():
+            break
+        positions[moved] = clamp_into_field(positions[moved])
+    return positions
+
+
+def observation_sizes(n):
+    """Number of features in each observation group for n balls."""
+    targets = n - 1
+    return {
+        "time": 1,
+        "cue": 2 + len(POCKETS) + 2 * targets,
+        "balls": (2 + 2 * len(POCKETS)) * targets,
+        "straightness": targets * len(POCKETS),
+        "possibility": targets * len(POCKETS),
+    }
+
+
 def is_point_outside_polygon(point, vertices):
     """Checks if a point is outside a given polygon using the Ray Casting method."""
     x, y = point
@@ -53,6 +126,7 @@ class Ball:
         self.body.position = x, y
         self.shape = pymunk.Circle(self.body, BALL_RADIUS)
         self.shape.elasticity = ELASTICITY
+        self.shape.collision_type = CUE_COLLISION_TYPE if color == RED else WHITE_COLLISION_TYPE
         #self.shape.friction = 0.9
         self.pocketed = False
         space.add(self.body, self.shape)
@@ -60,17 +134,62 @@ class Ball:
 
 
 class Table:
-    def __init__(self, n):
-        self.space = pymunk.Space()
+    def __init__(self, n, large_rack=False, preset="default", record_contacts=False, fast_forward=True,
+                 solver_threads=None, rng=None):
+        self.large_rack = large_rack
+        # Random layouts and respots are drawn from rng, a random.Random; the global one by default.
+        self.rng = rng or random
+        if large_rack:
+            self.space = self.create_dense_space(n, solver_threads)
+        else:
+            self.space = pymunk.Space()
         self.space.gravity = (0, 0)
+        self.set_preset(preset)
         #self.space.collision_slop = 0.01
         #self.space.damping = DAMPING
         self.create_walls()
+        self.create_pockets()
         self.balls = []
         self.cue_ball = None
         self.num = n
         self.logging = None
         self.time = 1
+        self.aim_key = None
+        self.aim = None
+        self.possibility_key = None
+        self.possibility = None
+        self.substep = 0
+        self.fast_forward = fast_forward
+        self.record_contacts = record_contacts
+        if record_contacts:
+            self.setup_collision_handlers()
+
+    def create_dense_space(self, n, threads=None):
+        """
+        Creates a space tuned for racks of 15+ balls: a spatial hash with cells the size of a
+        ball and the threaded solver where pymunk supports it (not on Windows). threads
+        defaults to the cores this process may run on, up to MAX_SOLVER_THREADS. Solver
+        iterations come from the physics preset.
+        """
+        if threads is None:
+            cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+            threads = min(cores, MAX_SOLVER_THREADS)
+        threaded = sys.platform != "win32" and threads > 1
+        space = pymunk.Space(threaded=threaded)
+        if threaded:
+            space.threads = min(threads, MAX_SOLVER_THREADS)
+        space.use_spatial_hash(2 * BALL_RADIUS, LARGE_RACK_HASH_CELLS_PER_BALL * n)
+        return space
+
+    def set_preset(self, preset):
+        """Applies a named entry of PHYSICS_PRESETS: timestep, solver iterations and settle speed."""
+        config = PHYSICS_PRESETS[preset]
+        self.preset = preset
+        self.timestep = config["timestep"]
+        self.space.iterations = config["iterations"]
+        self.settle_speed = config["settle_speed"]
+        # Friction decay is tuned per substep at REFERENCE_TIMESTEP; keep it per simulated second.
+        self.friction_dt = FRICTION_DT * (self.timestep / REFERENCE_TIMESTEP)
 
     def close(self):
         for ball in self.balls:
@@ -89,33 +208,55 @@ class Table:
             pymunk.Segment(self.space.static_body, (1280, 35), (1280, 605), 1)
         ]
         for line in self.static_lines:
-            line.elasticity = 0.7
+            line.elasticity = WALL_ELASTICITY
+            line.collision_type = WALL_COLLISION_TYPE
             self.space.add(line)
 
 
+    def create_pockets(self):
+        """Creates sensor regions behind each pocket mouth that flag balls about to be pocketed."""
+        self.near_pocket = {}
+        self.pocket_sensors = []
+        for pocket, (start, end) in enumerate(POCKET_MOUTHS):
+            a = Vec2d(*start)
+            b = Vec2d(*end)
+            outward = (b - a).perpendicular_normal() * -POCKET_DEPTH
+            sensor = pymunk.Poly(self.space.static_body, [a, b, b + outward, a + outward])
+            sensor.sensor = True
+            sensor.collision_type = POCKET_COLLISION_TYPE
+            self.pocket_sensors.append(sensor)
+            self.space.add(sensor)
+
+        def ball_enters(arbiter, space, data):
+            sensor, shape = arbiter.shapes
+            self.near_pocket[shape] = self.pocket_sensors.index(sensor)
+            return True
+
+        def ball_leaves(arbiter, space, data):
+            self.near_pocket.pop(arbiter.shapes[1], None)
+
+        handler = self.space.add_wildcard_collision_handler(POCKET_COLLISION_TYPE)
+        handler.begin = ball_enters
+        handler.separate = ball_leaves
+
+
     def draw_walls(self):
         """Draws the pool table walls."""
-        pygame.draw.line(self.screen, BROWN, (30, 0), (620, 0), 5)
-        pygame.draw.line(self.screen, BROWN, (660, 0), (1250, 0), 5)
-        pygame.draw.line(self.screen, BROWN, (30, 640), (620, 640), 5)
-        pygame.draw.line(self.screen, BROWN, (660, 640), (1250, 640), 5)
-        pygame.draw.line(self.screen, BROWN, (0, 30), (0, 610), 5)
-        pygame.draw.line(self.screen, BROWN, (1280, 30), (1280, 610), 5)
+        for start, end in WALL_LINES:
+            pygame.draw.line(self.screen, BROWN, start, end, 5)
 
 
     def draw_pockets(self):
         """Draws the pockets on the pool table."""
-        pygame.draw.line(self.screen, BLACK, (0, 30), (30, 0), 5)
-        pygame.draw.line(self.screen, BLACK, (1250, 0), (1280, 30), 5)
-        pygame.draw.line(self.screen, BLACK, (0, 610), (30, 640), 5)
-        pygame.draw.line(self.screen, BLACK, (1250, 640), (1280, 610), 5)
-        pygame.draw.line(self.screen, BLACK, (620, 0), (660, 0), 5)
-        pygame.draw.line(self.screen, BLACK, (620, 640), (660, 640), 5)
+        for start, end in POCKET_LINES:
+            pygame.draw.line(self.screen, BLACK, start, end, 5)
 
 
     def draw_balls(self):
         """Draws all balls on the screen."""
         for ball in self.balls:
+            if ball.pocketed:
+                continue
             pygame.draw.circle(self.screen, ball.color, (int(ball.body.position.x), int(ball.body.position.y)), BALL_RADIUS)
         
 
@@ -124,23 +265,34 @@ class Table:
         for ball in self.balls:
             speed = ball.body.velocity.length
             if speed > 0:
-                decay1 = MU * G * (1 / 60) 
-                decay2 = ALPHA * speed * (1 / 60) 
-                decay3 = BETA * speed ** 2 * (1 / 60)
+                decay1 = MU * G * self.friction_dt
+                decay2 = ALPHA * speed * self.friction_dt
+                decay3 = BETA * speed ** 2 * self.friction_dt
                 new_speed = max(0, speed - decay1 - decay2 - decay3)
-                if new_speed == 0:
+                if new_speed <= self.settle_speed:
                     ball.body.velocity = (0, 0)
                 else:
                     ball.body.velocity = ball.body.velocity.normalized() * new_speed
 
-    def create_triangle(self):
+    def create_triangle(self, count=15):
+        """Racks count white balls in a triangle, adding rows until all of them fit."""
         start_x = 900
         start_y = HEIGHT // 2
-        for i in range(5):  
-            for j in range(i + 1):
+        i = 0
+        while count > 0:
+            for j in range(min(i + 1, count)):
                 x = start_x + i * (BALL_RADIUS * 2 + 1)
                 y = start_y - i * (BALL_RADIUS + 0.5) + j * (BALL_RADIUS * 2 + 1)
-                self.create_ball(x, y, WHITE)
+                self.balls.append(Ball(x, y, WHITE, self.space))
+            count -= i + 1
+            i += 1
+
+
+    def generate_rack(self, n):
+        """Places the cue ball at the break position and racks the other n-1 balls."""
+        self.cue_ball = Ball(BREAK_POSITION[0], BREAK_POSITION[1], RED, self.space)
+        self.balls.append(self.cue_ball)
+        self.create_triangle(n - 1)
 
 
     def render(self):
@@ -181,6 +333,7 @@ class Table:
 
         self.reset_logging()
 
+        self.substep = 0
         running = True
         while running:
             for event in pygame.event.get():
@@ -198,7 +351,10 @@ class Table:
 
             self.draw_balls()
 
-            self.space.step(1 / 300)
+            self.space.step(self.timestep)
+            self.substep += 1
+            if self.near_pocket:
+                self.check_captured(self.substep)
             self.apply_friction()
 
             if self.check_stop():
@@ -206,8 +362,8 @@ class Table:
 
             pygame.display.flip()
 
-            self.clock.tick(300)
-        self.check_pocketed()
+            self.clock.tick(round(1 / self.timestep))
+        self.check_pocketed(self.substep)
         pygame.display.quit()
         pygame.quit()
 
@@ -216,7 +372,7 @@ class Table:
         """Applies a shot to the cue ball."""
         force = SHOOT_FORCE
         self.cue_ball.body.angular_velocity = 0
-        angle = self.calc_angle(action)
+        angle = self.shot_angle(action)
         self.cue_ball.body.apply_impulse_at_local_point((force * math.cos(angle), force * math.sin(angle)))
         self.new_render()
         time.sleep(1)
@@ -226,8 +382,8 @@ class Table:
         positions = []
 
         while len(positions) < 2:
-            x = random.randint(BALL_RADIUS + 30, WIDTH - BALL_RADIUS - 30)
-            y = random.randint(BALL_RADIUS + 30, HEIGHT - BALL_RADIUS - 30)
+            x = self.rng.randint(BALL_RADIUS + 30, WIDTH - BALL_RADIUS - 30)
+            y = self.rng.randint(BALL_RADIUS + 30, HEIGHT - BALL_RADIUS - 30)
             overlap = False
             for pos in positions:
                 if math.hypot(x - pos[0], y - pos[1]) < BALL_RADIUS * 2:
@@ -244,8 +400,8 @@ class Table:
     def generate_n_random(self, n):
         positions = []
         while len(positions) < n:
-            x = random.randint(BALL_RADIUS + 30, WIDTH - BALL_RADIUS - 30)
-            y = random.randint(BALL_RADIUS + 30, HEIGHT - BALL_RADIUS - 30)
+            x = self.rng.randint(BALL_RADIUS + 30, WIDTH - BALL_RADIUS - 30)
+            y = self.rng.randint(BALL_RADIUS + 30, HEIGHT - BALL_RADIUS - 30)
             overlap = False
             for pos in positions:
                 if math.hypot(x - pos[0], y - pos[1]) < BALL_RADIUS * 2:
@@ -262,8 +418,8 @@ class Table:
 
     def respot_red(self):
         while True:
-            x = random.randint(BALL_RADIUS + 30, WIDTH - BALL_RADIUS - 30)
-            y = random.randint(BALL_RADIUS + 30, HEIGHT - BALL_RADIUS - 30)
+            x = self.rng.randint(BALL_RADIUS + 30, WIDTH - BALL_RADIUS - 30)
+            y = self.rng.randint(BALL_RADIUS + 30, HEIGHT - BALL_RADIUS - 30)
             overlap = False
             for ball in self.balls:
                 if math.hypot(x - ball.body.position.x, y - ball.body.position.y) < BALL_RADIUS * 2:
@@ -278,27 +434,70 @@ class Table:
     def check_stop(self):
         """Checks if all balls have stopped moving."""
         for ball in self.balls:
+            if ball.pocketed:
+                continue
             if ball.body.velocity.length > 0:
                 return False
         return True
 
 
-    def check_pocketed(self):
-        for ball in self.balls:
+    def capture_ball(self, index, substep, pocket=None):
+        """Removes a ball that has entered a pocket and records the event."""
+        ball = self.balls[index]
+        if pocket is None:
+            x, y = ball.body.position
+            pocket = min(range(len(POCKETS)), key=lambda i: math.hypot(x - POCKETS[i][0], y - POCKETS[i][1]))
+        self.logging["pocket_events"].append((index, pocket, substep))
+        self.near_pocket.pop(ball.shape, None)
+        self.space.remove(ball.body, ball.shape)
+        ball.body.velocity = (0, 0)
+        ball.pocketed = True
+        if ball.color == RED:
+            self.logging["red_pocketed"] = True
+        else:
+            self.logging["white_pocketed"] = True
+            ball.body.position = -100, -100
+
+
+    def check_captured(self, substep):
+        """Captures balls touching a pocket sensor whose center has left the field."""
+        for i, ball in enumerate(self.balls):
+            pocket = self.near_pocket.get(ball.shape)
+            if pocket is None or ball.pocketed:
+                continue
+            if is_point_outside_polygon(ball.body.position, FIELD):
+                self.capture_ball(i, substep, pocket)
+
+
+    def apply_outcome(self, positions, pocketed):
+        """
+        Ends a shot without simulating it: balls flagged in pocketed are captured, the rest are
+        placed at positions and stopped, then pocketed balls are handled as after make_shot.
+        Balls that would overlap are pushed apart first, so the table stays a reachable state.
+        """
+        on_table = ~np.asarray(pocketed, dtype=bool) & ~np.array([ball.pocketed for ball in self.balls])
+        positions = separate_balls(positions, on_table)
+        self.reset_logging()
+        for i, ball in enumerate(self.balls):
             if ball.pocketed:
                 continue
-            x, y = ball.body.position
-            if is_point_outside_polygon((x, y), FIELD):
-                if ball.color == RED:
-                    self.logging["red_pocketed"] = True
-                    self.space.remove(ball.body, ball.shape)
-                    self.respot_red()
-                    #self.setup_collision_handlers()
-                else:
-                    self.logging["white_pocketed"] = True
-                    ball.body.position = -100, -100
-                    ball.pocketed = True
-                    self.space.remove(ball.body, ball.shape)
+            if pocketed[i]:
+                self.capture_ball(i, -1)
+            else:
+                ball.body.position = tuple(positions[i])
+                ball.body.velocity = (0, 0)
+        self.check_pocketed()
+
+
+    def check_pocketed(self, substep=-1):
+        """Captures any ball left outside the field and respots a pocketed cue ball."""
+        for i, ball in enumerate(self.balls):
+            if ball.pocketed:
+                continue
+            if is_point_outside_polygon(ball.body.position, FIELD):
+                self.capture_ball(i, substep)
+        if self.cue_ball.pocketed:
+            self.respot_red()
 
 
     def calc_angle(self, action):
@@ -364,22 +563,146 @@ class Table:
         return angle
 
 
+    def layout(self):
+        """Returns (positions, pocketed, key) of the current layout; key is hashable bytes."""
+        positions = np.array([ball.body.position for ball in self.balls], dtype=np.float64)
+        pocketed = np.array([ball.pocketed for ball in self.balls], dtype=bool)
+        return positions, pocketed, positions.tobytes() + pocketed.tobytes()
+
+
+    def get_aim(self):
+        """Returns (angles, straightness) for all actions, recomputed only when the layout has changed."""
+        positions, pocketed, key = self.layout()
+        if key != self.aim_key:
+            self.aim_key = key
+            self.aim = aim_geometry(positions, pocketed)
+        return self.aim
+
+
+    def get_possibility(self):
+        """Returns pot possibility for all actions, recomputed only when the layout has changed."""
+        positions, pocketed, key = self.layout()
+        if key != self.possibility_key:
+            self.possibility_key = key
+            self.possibility = pot_possibility(positions, pocketed)
+        return self.possibility
+
+
+    def shot_angle(self, action):
+        """Same as calc_angle, read from the cached geometry of the current layout."""
+        if not 0 <= action < (self.num - 1) * len(POCKETS):
+            return 0.0
+        return float(self.get_aim()[0][action])
+
+
     def make_shot(self, action):
         """Applies a shot to the cue ball."""
+        self.strike(self.shot_angle(action))
+
+
+    def strike(self, angle):
+        """Shoots the cue ball at angle and simulates until every ball has stopped."""
         force = SHOOT_FORCE
         self.cue_ball.body.angular_velocity = 0
         for ball in self.balls:
             ball.body.angular_velocity = 0
-        angle = self.calc_angle(action)
         self.cue_ball.body.apply_impulse_at_local_point((force * math.cos(angle), force * math.sin(angle)))
         self.reset_logging()
+        self.substep = 0
         running = True
         while running:
-            self.space.step(1/300)
+            self.space.step(self.timestep)
+            self.substep += 1
+            if self.near_pocket:
+                self.check_captured(self.substep)
             self.apply_friction()
             if self.check_stop():
                 running = False
-        self.check_pocketed()
+            elif self.fast_forward and self.substep % FAST_FORWARD_INTERVAL == 0 and self.try_fast_forward():
+                running = False
+        self.check_pocketed(self.substep)
+
+
+    def rolling_speeds(self, speed):
+        """Returns the speeds a lone ball moves with on each substep until apply_friction stops it."""
+        speeds = []
+        while speed > 0:
+            speeds.append(speed)
+            decay1 = MU * G * self.friction_dt
+            decay2 = ALPHA * speed * self.friction_dt
+            decay3 = BETA * speed ** 2 * self.friction_dt
+            speed = max(0, speed - decay1 - decay2 - decay3)
+            if speed <= self.settle_speed:
+                speed = 0
+        return speeds
+
+
+    def try_fast_forward(self):
+        """
+        Moves every ball straight to where friction stops it, if no ball-ball or ball-cushion
+        contact can happen on the way. The check is conservative: it ignores timing and sweeps
+        each ball over an upper bound of its stopping distance (constant MU*G decay only).
+        Balls whose path leaves the field through a pocket mouth are captured at the substep
+        they cross it. Returns True if the shot was finished this way.
+        """
+        decay = MU * G * self.friction_dt
+        paths = {}
+        for i, ball in enumerate(self.balls):
+            if ball.pocketed:
+                continue
+            start = ball.body.position
+            speed = ball.body.velocity.length
+            if speed == 0:
+                paths[i] = (start, start, None)
+                continue
+            direction = ball.body.velocity / speed
+            bound = (speed * speed / (2 * decay) + speed) * self.timestep
+            paths[i] = (start, start + direction * bound, direction)
+        if all(direction is None for _, _, direction in paths.values()):
+            return False
+
+        for start, end, direction in paths.values():
+            if direction is None:
+                continue
+            for wall in self.static_lines:
+                if segment_distance(start, end, wall.a, wall.b) < BALL_RADIUS + wall.radius + FAST_FORWARD_MARGIN:
+                    return False
+        indices = list(paths)
+        for k, i in enumerate(indices):
+            start_i, end_i, direction_i = paths[i]
+            for j in indices[k + 1:]:
+                start_j, end_j, direction_j = paths[j]
+                if direction_i is None and direction_j is None:
+                    continue
+                if segment_distance(start_i, end_i, start_j, end_j) < 2 * BALL_RADIUS + FAST_FORWARD_MARGIN:
+                    return False
+
+        substeps = 0
+        for i, (start, _, direction) in paths.items():
+            if direction is None:
+                continue
+            body = self.balls[i].body
+            speeds = self.rolling_speeds(body.velocity.length)
+            travelled = np.cumsum(speeds) * self.timestep
+            steps = len(speeds)
+            capture = None
+            if is_point_outside_polygon(start + direction * travelled[-1], FIELD):
+                # The field is convex, so once the path is outside it stays outside.
+                lo, hi = 0, steps - 1
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if is_point_outside_polygon(start + direction * travelled[mid], FIELD):
+                        hi = mid
+                    else:
+                        lo = mid + 1
+                capture = steps = lo + 1
+            body.position = start + direction * travelled[steps - 1]
+            body.velocity = (0, 0)
+            if capture is not None:
+                self.capture_ball(i, self.substep + capture)
+            substeps = max(substeps, steps)
+        self.substep += substeps
+        return True
 
 
 
@@ -495,14 +818,7 @@ class Table:
         """
         Calculates the straightness value for all possible actions.
         """
-        num_actions = (self.num - 1) * len(POCKETS)
-        straightness_values = np.full(num_actions, -1.0, dtype=np.float32)
-
-        for action in range(num_actions):
-            straightness = self.get_straightness(action)
-            straightness_values[action] = straightness
-
-        return straightness_values
+        return self.get_aim()[1].astype(np.float32)
     
     def is_pot_possible(self, action):
         """
@@ -557,43 +873,57 @@ class Table:
     
 
     def calculate_possibility(self):
-        num_actions = (self.num - 1) * len(POCKETS)
-        pos_values = np.full(num_actions, 0, dtype=np.float32)
-
-        for action in range(num_actions):
-            pos = self.is_pot_possible(action)
-            pos_values[action] = pos
-
-        return pos_values
+        return self.get_possibility().astype(np.float32)
 
     
-    def setup_collision_handlers(self):
-        """Sets up collision handlers for tracking cue ball interactions."""
-        def cue_hits_white(arbiter, space, data):
-            """Triggered when the cue ball hits a white ball."""
-            self.logging["white_hit"] = True
-            if not self.logging["wall_hit"]:
-                self.logging["white_before_wall"] = True
-            return True
-
-        def cue_hits_wall(arbiter, space, data):
-            """Triggered when the cue ball hits a wall."""
-            self.logging["wall_hit"] = True
+    def setup_collision_handlers(self, capacity=CONTACT_CAPACITY):
+        """
+        Records the start of every ball-ball and ball-cushion contact into preallocated arrays:
+        substep, the two ids (ball index, or -1 - wall index for cushions) and the normal impulse
+        the contact is about to exchange. Only begin callbacks are used, so a contact costs one
+        Python call however long it lasts. Also tracks the cue ball's first contact.
+        """
+        self.contact_substeps = np.zeros(capacity, dtype=np.int32)
+        self.contact_pairs = np.zeros((capacity, 2), dtype=np.int16)
+        self.contact_impulses = np.zeros(capacity, dtype=np.float32)
+        self.num_contacts = 0
+        self.wall_ids = {wall: -1 - i for i, wall in enumerate(self.static_lines)}
+        self.contact_ids = dict(self.wall_ids)
+
+        def record_contact(arbiter, space, data):
+            a, b = arbiter.shapes
+            i = 0 if a.collision_type == CUE_COLLISION_TYPE else self.contact_ids[a]
+            j = self.contact_ids[b]
+            body_a, body_b = a.body, b.body
+            approach = -(body_b.velocity - body_a.velocity).dot(arbiter.normal)
+            if b.collision_type == WALL_COLLISION_TYPE:
+                mass = body_a.mass
+            else:
+                mass = body_a.mass * body_b.mass / (body_a.mass + body_b.mass)
+            k = self.num_contacts
+            if k < capacity:
+                self.contact_substeps[k] = self.substep + 1
+                self.contact_pairs[k] = i, j
+                self.contact_impulses[k] = (1 + arbiter.restitution) * mass * max(approach, 0.0)
+                self.num_contacts = k + 1
+            else:
+                self.logging["contacts_dropped"] += 1
+            if i == 0 and self.logging["first_contact"] == -1:
+                if j >= 0:
+                    self.logging["first_contact"] = j
+                else:
+                    self.logging["rail_before_contact"] = True
             return True
 
-        self.cue_ball.shape.collision_type = 1
-        for ball in self.balls:
-            if ball.color == WHITE:
-                ball.shape.collision_type = 2
-
-        for wall in self.static_lines:
-            wall.collision_type = 3
+        for a, b in [(CUE_COLLISION_TYPE, WHITE_COLLISION_TYPE), (WHITE_COLLISION_TYPE, WHITE_COLLISION_TYPE),
+                     (CUE_COLLISION_TYPE, WALL_COLLISION_TYPE), (WHITE_COLLISION_TYPE, WALL_COLLISION_TYPE)]:
+            self.space.add_collision_handler(a, b).begin = record_contact
 
-        handler1 = self.space.add_collision_handler(1, 2)
-        handler1.begin = cue_hits_white  
 
-        handler2 = self.space.add_collision_handler(1, 3)
-        handler2.begin = cue_hits_wall
+    def get_contacts(self):
+        """Returns (substeps, pairs, impulses) of the contacts recorded during the last shot."""
+        k = self.num_contacts
+        return self.contact_substeps[:k], self.contact_pairs[:k], self.contact_impulses[:k]
 
     
     def reset_logging(self):
@@ -601,7 +931,13 @@ class Table:
             "red_pocketed": False,
             "white_pocketed": False,
             "num_pocketed": 0,
+            "pocket_events": [],
         }
+        if self.record_contacts:
+            self.num_contacts = 0
+            self.logging["first_contact"] = -1
+            self.logging["rail_before_contact"] = False
+            self.logging["contacts_dropped"] = 0
 
 
     def reset(self):
@@ -613,28 +949,54 @@ class Table:
         self.time = 1
         self.cue_ball = None
         self.reset_logging()
-        self.generate_n_random(self.num)
-        #self.setup_collision_handlers()
+        if self.large_rack:
+            self.generate_rack(self.num)
+        else:
+            self.generate_n_random(self.num)
+        if self.record_contacts:
+            self.contact_ids = dict(self.wall_ids)
+            for i, ball in enumerate(self.balls):
+                self.contact_ids[ball.shape] = i
 
 
     def get_time(self):
         """Returns the time since the last reset."""
         return self.time
 
-    def get_observation(self):
-        """Returns the observation of the environment."""
-        #n = (2 + 6 + 2*(self.num_balls-1)) + 2*(self.num_balls-1) + 6*(self.num_balls-1) + 6*(self.num_balls-1)
+    def observation_size(self, groups=OBSERVATION_GROUPS):
+        """Length of the observation made of the given feature groups."""
+        sizes = observation_sizes(self.num)
+        return sum(sizes[group] for group in self.observation_groups(groups))
+
+    @staticmethod
+    def observation_groups(groups):
+        """Validates groups and returns them in the canonical OBSERVATION_GROUPS order."""
+        unknown = set(groups) - set(OBSERVATION_GROUPS)
+        if unknown:
+            raise ValueError(f"Unknown observation groups {sorted(unknown)}, expected some of {OBSERVATION_GROUPS}")
+        return tuple(group for group in OBSERVATION_GROUPS if group in groups)
+
+    def get_observation(self, groups=OBSERVATION_GROUPS, timings=None):
+        """
+        Returns the observation of the environment, made of the requested feature groups in
+        OBSERVATION_GROUPS order. Other groups are not computed. If timings is a dict, the
+        seconds spent on each group are stored in it.
+        """
+        features = {
+            "time": lambda: [self.get_time()],
+            "cue": self.calculate_cue_pos,
+            "balls": self.calculate_ball_pos,
+            "straightness": self.calculate_straightness,
+            "possibility": self.calculate_possibility,
+        }
         arr = []
-        time = self.get_time()
-        cue_info = self.calculate_cue_pos()
-        ball_info = self.calculate_ball_pos()
-        str_info = self.calculate_straightness()
-        pos_info = self.calculate_possibility()
-        arr.append(time)
-        arr.extend(cue_info)
-        arr.extend(ball_info)
-        arr.extend(str_info)
-        arr.extend(pos_info)
+        for group in self.observation_groups(groups):
+            if timings is None:
+                arr.extend(features[group]())
+                continue
+            start = time.perf_counter()
+            arr.extend(features[group]())
+            timings[group] = time.perf_counter() - start
         return np.array(arr, dtype=np.float32)
 
 
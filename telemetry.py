@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+import torch
+
+try:
+    from stable_baselines3.common.callbacks import BaseCallback
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+from pool_env import current_rss
+
+
+# Only TensorBoard can show histograms; keep them out of the text outputs.
+HISTOGRAM_EXCLUDE = ("stdout", "log", "json", "csv")
+
+
+class TelemetryCallback(BaseCallback):
+    """
+    Logs where training time goes, once per rollout: rollout collection vs gradient
+    update time, and per env worker its steps/sec, idle fraction and RSS, plus
+    histograms of shot and observation times and the mean time of each observation
+    group. Worker numbers come from info["telemetry"], so the envs must be created
+    with PoolEnv(..., telemetry=True).
+    """
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.rollout_start = None
+        self.rollout_end = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.shot_times = []
+        self.obs_times = []
+        self.obs_group_times = {}
+        self.busy = {}
+        self.idle = {}
+        self.steps = {}
+        self.rss = {}
+
+    def _on_rollout_start(self):
+        now = time.perf_counter()
+        if self.rollout_end is not None:
+            self.logger.record("telemetry/update_time", now - self.rollout_end)
+        self.rollout_start = now
+        self.reset_stats()
+
+    def _on_step(self):
+        for i, info in enumerate(self.locals.get("infos", [])):
+            data = info.get("telemetry")
+            if data is None:
+                continue
+            self.shot_times.append(data["shot_time"])
+            self.obs_times.append(data["obs_time"])
+            for group, seconds in data.get("obs_group_times", {}).items():
+                self.obs_group_times.setdefault(group, []).append(seconds)
+            self.busy[i] = self.busy.get(i, 0.0) + data["shot_time"] + data["obs_time"]
+            self.idle[i] = self.idle.get(i, 0.0) + data["idle_time"]
+            self.steps[i] = self.steps.get(i, 0) + 1
+            self.rss[i] = data["rss"]
+        return True
+
+    def _on_rollout_end(self):
+        self.rollout_end = time.perf_counter()
+        rollout_time = self.rollout_end - self.rollout_start
+        self.logger.record("telemetry/rollout_time", rollout_time)
+        self.logger.record("telemetry/learner_rss_mb", current_rss() / 2**20)
+        if not self.steps:
+            return
+        total_steps = sum(self.steps.values())
+        self.logger.record("telemetry/env_steps_per_sec", total_steps / rollout_time)
+        for i in sorted(self.steps):
+            busy, idle = self.busy[i], self.idle[i]
+            self.logger.record(f"telemetry/worker_{i}/steps_per_sec", self.steps[i] / rollout_time)
+            self.logger.record(f"telemetry/worker_{i}/idle_fraction", idle / (busy + idle) if busy + idle else 0.0)
+            self.logger.record(f"telemetry/worker_{i}/rss_mb", self.rss[i] / 2**20)
+        self.logger.record("telemetry/mean_shot_ms", float(np.mean(self.shot_times)) * 1000)
+        self.logger.record("telemetry/mean_obs_ms", float(np.mean(self.obs_times)) * 1000)
+        for group, times in self.obs_group_times.items():
+            self.logger.record(f"telemetry/obs_group_ms/{group}", float(np.mean(times)) * 1000)
+        self.logger.record("telemetry/shot_time_ms", torch.tensor(self.shot_times) * 1000, exclude=HISTOGRAM_EXCLUDE)
+        self.logger.record("telemetry/obs_time_ms", torch.tensor(self.obs_times) * 1000, exclude=HISTOGRAM_EXCLUDE)
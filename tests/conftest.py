@@ -0,0 +1,45 @@
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def make_model():
+    """Factory for a tiny PPO model on a 2-ball PoolEnv."""
+    from stable_baselines3 import PPO
+    from pool_env import PoolEnv
+
+    def make():
+        return PPO("MlpPolicy", PoolEnv(2), n_steps=16, batch_size=16, n_epochs=1, seed=0, device="cpu")
+    return make
+
+
+@pytest.fixture
+def random_tables():
+    """
+    Factory for generators of count random n-ball tables. Some balls are pocketed and
+    table.time counts up; with touching, every third layout puts a ball next to the cue ball.
+    """
+    import random
+    from table import Table
+
+    def generate(n, count, seed=0, touching=False):
+        random.seed(seed)
+        table = Table(n)
+        for i in range(count):
+            table.reset()
+            for ball in table.balls[1:]:
+                if random.random() < 0.2:
+                    table.space.remove(ball.body, ball.shape)
+                    ball.pocketed = True
+                    ball.body.position = -100, -100
+            if touching and i % 3 == 0:
+                a, b = table.balls[0], table.balls[-1]
+                b.body.position = a.body.position + (2 * 14 + 1, 0)
+            table.time = i + 1
+            yield table
+    return generate
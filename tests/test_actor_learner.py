@@ -0,0 +1,63 @@
+import multiprocessing as mp
+import sys
+
+import pytest
+import torch
+
+import actor_learner
+from actor_learner import next_full_slot, train, vtrace
+
+
+def discounted_returns(rewards, dones, bootstrap_value, gamma):
+    returns = torch.zeros_like(rewards)
+    acc = bootstrap_value
+    for t in reversed(range(rewards.shape[0])):
+        acc = rewards[t] + gamma * (1.0 - dones[t]) * acc
+        returns[t] = acc
+    return returns
+
+
+def test_vtrace_on_policy_matches_discounted_returns():
+    torch.manual_seed(0)
+    T, B = 7, 3
+    log_probs = torch.randn(T, B)
+    rewards = torch.randn(T, B)
+    dones = (torch.rand(T, B) < 0.3).float()
+    values = torch.randn(T, B)
+    bootstrap = torch.randn(B)
+
+    vs, advantages = vtrace(log_probs, log_probs, rewards, dones, values, bootstrap, gamma=0.9)
+
+    returns = discounted_returns(rewards, dones, bootstrap, 0.9)
+    torch.testing.assert_close(vs, returns)
+    next_vs = torch.cat([vs[1:], bootstrap.unsqueeze(0)])
+    torch.testing.assert_close(advantages, rewards + 0.9 * (1.0 - dones) * next_vs - values)
+
+
+def test_vtrace_clips_importance_weights_of_stale_actions():
+    T, B = 4, 2
+    behaviour = torch.full((T, B), -3.0)
+    target = torch.zeros(T, B)
+    rewards = torch.ones(T, B)
+    dones = torch.zeros(T, B)
+    values = torch.zeros(T, B)
+    bootstrap = torch.zeros(B)
+
+    clipped, _ = vtrace(behaviour, target, rewards, dones, values, bootstrap, gamma=1.0)
+    on_policy, _ = vtrace(target, target, rewards, dones, values, bootstrap, gamma=1.0)
+    torch.testing.assert_close(clipped, on_policy)
+
+
+def test_short_run_consumes_the_requested_timesteps():
+    model = train(2, 1, 64, segment_len=8, batch_segments=2, log_interval=1, seed=0)
+    assert model.num_timesteps >= 64
+
+
+def test_learner_raises_when_an_actor_dies(monkeypatch):
+    monkeypatch.setattr(actor_learner, "ACTOR_POLL_INTERVAL", 0.05)
+    ctx = mp.get_context("spawn")
+    crashed = ctx.Process(target=sys.exit, args=(3,))
+    crashed.start()
+    crashed.join()
+    with pytest.raises(RuntimeError, match="exit code 3"):
+        next_full_slot(ctx.Queue(), [crashed])
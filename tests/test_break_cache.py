@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pytest
+
+import break_cache
+from break_cache import BreakCache, break_key, break_outcome, play_break
+from pool_env import PoolEnv
+from table import Table
+
+
+def racked(n):
+    table = Table(n, large_rack=True)
+    table.reset()
+    return table
+
+
+def test_cached_break_leaves_the_table_as_the_simulated_one():
+    cache = BreakCache(10)
+    random.seed(3)
+    simulated = racked(10)
+    key = break_key(simulated)
+    random.seed(4)
+    assert not play_break(simulated, key, cache)
+    random.seed(4)
+    replayed = racked(10)
+    assert play_break(replayed, key, cache)
+    for a, b in zip(simulated.balls, replayed.balls):
+        assert a.pocketed == b.pocketed
+        assert tuple(a.body.position) == pytest.approx(tuple(b.body.position))
+    assert np.array_equal(simulated.get_observation(), replayed.get_observation())
+    assert replayed.logging["white_pocketed"] == simulated.logging["white_pocketed"]
+
+
+def test_break_moves_the_rack():
+    table = racked(6)
+    before = break_outcome(table)[0]
+    play_break(table, break_key(table))
+    assert np.abs(break_outcome(table)[0][1:] - before[1:]).max() > 1
+
+
+def test_cache_counts_hits_and_persists(tmp_path):
+    path = str(tmp_path / "breaks.npz")
+    cache = BreakCache(6, path=path)
+    for _ in range(2):
+        play_break(racked(6), (320, 320, 0), cache)
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "hit_rate": 0.5}
+    cache.save()
+    other = BreakCache(6, path=path)
+    play_break(racked(6), (320, 334, 0), other)
+    cache.put((320, 306, 0), *break_outcome(racked(6)))
+    other.save()
+    cache.save()
+    assert len(BreakCache(6, path=path)) == 3
+    with pytest.raises(ValueError):
+        BreakCache(8, path=path)
+    with pytest.raises(ValueError):
+        BreakCache(6, preset="fast", path=path)
+
+
+def test_env_starts_episodes_after_a_cached_break(tmp_path, monkeypatch):
+    monkeypatch.setattr(break_cache, "BREAK_CUE_OFFSETS", (0,))
+    monkeypatch.setattr(break_cache, "BREAK_ANGLE_OFFSETS", 0)
+    path = str(tmp_path / "breaks.npz")
+    env = PoolEnv(6, break_shot=True, break_cache=path)
+    obs, info = env.reset()
+    assert not info["break"]["cached"] and obs.shape == env.observation_space.shape
+    obs, info = env.reset()
+    assert info["break"]["cached"] and info["break"]["hit_rate"] == 0.5
+    env.step(env.action_space.sample())
+    env.close()
+    _, info = PoolEnv(6, break_shot=True, break_cache=path).reset()
+    assert info["break"] == {"cached": True, "hits": 1, "misses": 0, "size": 1, "hit_rate": 1.0}
@@ -0,0 +1,66 @@
+import os
+import threading
+
+import torch
+from stable_baselines3 import PPO
+
+import checkpointing
+from checkpointing import BackgroundCheckpointCallback, latest_checkpoint
+
+
+def test_checkpoints_are_written_in_the_background_and_load(tmp_path, make_model):
+    model = make_model()
+    callback = BackgroundCheckpointCallback(save_freq=16, save_path=str(tmp_path), name_prefix="pool")
+    model.learn(64, callback=callback)
+    callback.save_now(str(tmp_path / "pool_final"), model)
+    callback.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert "pool_64_steps.zip" in names
+    assert "pool_final.zip" in names
+    assert not [name for name in names if name.endswith(".tmp")]
+
+    loaded = PPO.load(str(tmp_path / "pool_final.zip"), device="cpu")
+    for a, b in zip(model.policy.parameters(), loaded.policy.parameters()):
+        torch.testing.assert_close(a, b)
+    assert loaded.num_timesteps == model.num_timesteps
+
+
+def test_snapshot_is_not_affected_by_later_updates(tmp_path, make_model):
+    model = make_model()
+    snapshot = checkpointing.snapshot_model(model)
+    before = [p.detach().clone() for p in model.policy.parameters()]
+    with torch.no_grad():
+        for p in model.policy.parameters():
+            p.add_(1.0)
+    checkpointing.write_checkpoint(str(tmp_path / "snap.zip"), snapshot)
+    loaded = PPO.load(str(tmp_path / "snap.zip"), device="cpu")
+    for a, b in zip(before, loaded.policy.parameters()):
+        torch.testing.assert_close(a, b)
+
+
+def test_saves_are_skipped_while_the_queue_is_full(tmp_path, monkeypatch, make_model):
+    release = threading.Event()
+    write = checkpointing.write_checkpoint
+
+    def slow_write(path, snapshot):
+        release.wait()
+        write(path, snapshot)
+
+    monkeypatch.setattr(checkpointing, "write_checkpoint", slow_write)
+    model = make_model()
+    callback = BackgroundCheckpointCallback(save_freq=16, save_path=str(tmp_path), name_prefix="pool")
+    model.learn(96, callback=callback)
+    assert callback.skipped > 0
+    release.set()
+    callback.close()
+    assert callback.written + callback.skipped == 6
+
+
+def test_latest_checkpoint_ignores_incomplete_files(tmp_path, make_model):
+    model = make_model()
+    model.save(str(tmp_path / "pool_100_steps.zip"))
+    (tmp_path / "pool_200_steps.zip").write_bytes(b"partial")
+    (tmp_path / "pool_300_steps.zip.tmp").write_bytes(b"partial")
+    assert latest_checkpoint(str(tmp_path), "pool") == str(tmp_path / "pool_100_steps.zip")
+    assert latest_checkpoint(str(tmp_path / "missing"), "pool") is None
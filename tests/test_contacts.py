@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from table import Table
+
+
+def make_table(positions, record_contacts=True):
+    random.seed(0)
+    table = Table(len(positions), record_contacts=record_contacts)
+    table.reset()
+    for ball, pos in zip(table.balls, positions):
+        ball.body.position = pos
+    return table
+
+
+def test_head_on_hit_records_first_contact_and_impulse():
+    # Out-of-range actions shoot along +x.
+    table = make_table([(300, 320), (600, 320), (1000, 100)])
+    table.make_shot(12)
+    substeps, pairs, impulses = table.get_contacts()
+
+    assert table.logging["first_contact"] == 1
+    assert not table.logging["rail_before_contact"]
+    assert tuple(pairs[0]) == (0, 1)
+    assert 0 < substeps[0] <= table.substep
+
+    # Equal masses, elastic head-on: the impulse equals the cue ball's speed at impact.
+    replay = make_table([(300, 320), (600, 320), (1000, 100)], record_contacts=False)
+    replay.cue_ball.body.apply_impulse_at_local_point((800, 0))
+    for _ in range(substeps[0] - 1):
+        replay.space.step(replay.timestep)
+        replay.apply_friction()
+    assert impulses[0] == pytest.approx(replay.cue_ball.body.velocity.length, rel=1e-4)
+
+
+def test_rail_before_contact():
+    table = make_table([(1100, 320), (300, 320)])
+    table.make_shot(6)
+    _, pairs, _ = table.get_contacts()
+
+    assert table.logging["rail_before_contact"]
+    assert pairs[0][0] == 0 and pairs[0][1] < 0
+
+
+def test_recording_does_not_change_the_shot():
+    recorded = make_table([(300, 320), (600, 330), (900, 300)])
+    plain = make_table([(300, 320), (600, 330), (900, 300)], record_contacts=False)
+    recorded.make_shot(0)
+    plain.make_shot(0)
+    assert recorded.substep == plain.substep
+    for a, b in zip(recorded.balls, plain.balls):
+        assert a.body.position == b.body.position
+    assert "first_contact" not in plain.logging
+
+
+def test_overflow_is_counted():
+    table = make_table([(300, 320), (500, 320), (700, 320), (900, 320)])
+    table.setup_collision_handlers(capacity=1)
+    table.reset_logging()
+    for i, ball in enumerate(table.balls):
+        table.contact_ids[ball.shape] = i
+    table.make_shot(18)
+    assert table.num_contacts == 1
+    assert table.logging["contacts_dropped"] > 0
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from env_server import OP_CLOSE, OP_CREATE, OP_RESET, OP_STEP, EnvClient, EnvServer, RemoteVecEnv
+from pool_env import PoolEnv
+
+
+NUM_BALLS = 2
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def server(request, tmp_path):
+    address = "127.0.0.1:0" if request.param == "tcp" else str(tmp_path / "pool.sock")
+    loop = asyncio.new_event_loop()
+    server = EnvServer(address, num_workers=1)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_create_reset_step_close_round_trip(server):
+    expected_shape = PoolEnv(NUM_BALLS).observation_space.shape
+    client = EnvClient(server.bound_address())
+    [(env_id, num_actions, obs_dim)] = client.request([(OP_CREATE, 0, NUM_BALLS)])
+    assert num_actions == (NUM_BALLS - 1) * 6
+    assert (obs_dim,) == expected_shape
+
+    [obs] = client.request([(OP_RESET, env_id, 3)])
+    assert obs.shape == expected_shape
+    [(obs, reward, done, terminal)] = client.request([(OP_STEP, env_id, 0)])
+    assert obs.shape == expected_shape
+    assert isinstance(reward, float)
+
+    client.request([(OP_CLOSE, env_id, 0)])
+    assert env_id not in server.env_worker
+    client.close()
+
+
+def test_seeded_resets_are_reproducible(server):
+    client = EnvClient(server.bound_address())
+    [(env_id, _, _)] = client.request([(OP_CREATE, 0, NUM_BALLS)])
+    [first] = client.request([(OP_RESET, env_id, 7)])
+    client.request([(OP_RESET, env_id, 8)])
+    [again] = client.request([(OP_RESET, env_id, 7)])
+    np.testing.assert_array_equal(first, again)
+    client.close()
+
+
+def test_errors_carry_the_cause(server):
+    client = EnvClient(server.bound_address())
+    with pytest.raises(RuntimeError, match="not owned"):
+        client.request([(OP_STEP, 12345, 0)])
+    client.close()
+
+
+def test_envs_of_other_connections_are_rejected(server):
+    owner = EnvClient(server.bound_address())
+    other = EnvClient(server.bound_address())
+    [(env_id, _, _)] = owner.request([(OP_CREATE, 0, NUM_BALLS)])
+    owner.request([(OP_RESET, env_id, -1)])
+    for op in (OP_RESET, OP_STEP, OP_CLOSE):
+        with pytest.raises(RuntimeError, match="not owned"):
+            other.request([(op, env_id, 0)])
+    assert env_id in server.env_worker
+    owner.close()
+    other.close()
+
+
+def test_vec_env_batches_steps_and_returns_terminal_observation(server):
+    num_envs = 8
+    vec_env = RemoteVecEnv(server.bound_address(), num_envs, NUM_BALLS)
+    expected_shape = PoolEnv(NUM_BALLS).observation_space.shape
+    obs = vec_env.reset()
+    assert obs.shape == (num_envs,) + expected_shape
+    assert vec_env.observation_space.shape == expected_shape
+
+    requests_before, batches_before = server.stats()
+    seen_done = False
+    for _ in range(200):
+        actions = np.zeros(num_envs, dtype=np.int64)
+        obs, rewards, dones, infos = vec_env.step(actions)
+        assert obs.shape == (num_envs,) + expected_shape
+        for done, info in zip(dones, infos):
+            if done:
+                seen_done = True
+                assert info["terminal_observation"].shape == expected_shape
+            else:
+                assert "terminal_observation" not in info
+        if seen_done:
+            break
+    assert seen_done
+
+    requests, batches = server.stats()
+    assert (requests - requests_before) / (batches - batches_before) > 1
+    vec_env.close()
+
+
+def test_envs_are_closed_when_the_client_disconnects(server):
+    client = EnvClient(server.bound_address())
+    created = client.request([(OP_CREATE, 0, NUM_BALLS)] * 3)
+    env_ids = [env_id for env_id, _, _ in created]
+    assert all(env_id in server.env_worker for env_id in env_ids)
+    client.close()
+    assert wait_for(lambda: not any(env_id in server.env_worker for env_id in env_ids))
+    assert wait_for(lambda: all(w.num_envs == 0 for w in server.workers))
+
+
+def test_failed_create_is_not_counted(server):
+    client = EnvClient(server.bound_address())
+    with pytest.raises(RuntimeError, match="ValueError"):
+        client.request([(OP_CREATE, 0, 1)])
+    assert wait_for(lambda: all(w.num_envs == 0 for w in server.workers))
+    assert not server.env_worker
+    client.close()
+
+
+def test_requests_fail_when_the_worker_dies(server):
+    client = EnvClient(server.bound_address())
+    [(env_id, _, _)] = client.request([(OP_CREATE, 0, NUM_BALLS)])
+    process = server.workers[0].process
+    process.kill()
+    process.join()
+    with pytest.raises(RuntimeError, match="died"):
+        client.request([(OP_STEP, env_id, 0)])
+    with pytest.raises(RuntimeError, match="died"):
+        client.request([(OP_RESET, env_id, -1)])
+    client.close()
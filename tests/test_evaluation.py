@@ -0,0 +1,56 @@
+import math
+import os
+
+import pytest
+from stable_baselines3.common.logger import configure
+
+from checkpointing import BackgroundCheckpointCallback
+from episodes import run_episodes, summarize
+from evaluation import PeriodicEvaluator, split_cores
+
+
+def test_run_episodes_is_reproducible(tmp_path, make_model):
+    path = str(tmp_path / "model.zip")
+    make_model().save(path)
+    first = run_episodes(path, 2, [0, 1, 2], max_steps=20)
+    assert first == run_episodes(path, 2, [0, 1, 2], max_steps=20)
+    for done, shots, pots, scratches in first:
+        assert 1 <= shots <= 20
+        assert pots == (1 if done else 0)
+
+
+def test_summarize_metrics():
+    metrics = summarize([(True, 4, 1, 1), (False, 10, 0, 2)])
+    assert metrics["eval/mean_steps_to_clear"] == 4
+    assert metrics["eval/clear_rate"] == 0.5
+    assert metrics["eval/pot_rate"] == 1 / 14
+    assert metrics["eval/scratch_rate"] == 3 / 14
+    assert math.isnan(summarize([(False, 3, 0, 0)])["eval/mean_steps_to_clear"])
+
+
+@pytest.mark.parametrize("numpy_inference", [False, True])
+def test_checkpoints_are_evaluated_once_written_and_the_final_model_too(tmp_path, make_model, numpy_inference):
+    model = make_model()
+    model.set_logger(configure(str(tmp_path / "logs"), ["csv"]))
+    checkpoints = BackgroundCheckpointCallback(save_freq=16, save_path=str(tmp_path), name_prefix="pool")
+    evaluator = PeriodicEvaluator(checkpoints, num_balls=2, eval_freq=16, num_episodes=4, num_workers=1, max_steps=10,
+                                  numpy_inference=numpy_inference)
+    model.learn(64, callback=[checkpoints, evaluator])
+    checkpoints.save_now(str(tmp_path / "pool_final"), model)
+    checkpoints.close()
+    evaluator.close()
+
+    paths = [path for path, _, _ in evaluator.history]
+    assert paths[0].endswith("_steps.zip")
+    assert paths[-1] == str(tmp_path / "pool_final.zip")
+    path, timesteps, metrics = evaluator.history[-1]
+    assert timesteps == 64
+    assert set(metrics) == {"eval/mean_steps_to_clear", "eval/clear_rate", "eval/pot_rate", "eval/scratch_rate"}
+    assert "eval/pot_rate" in (tmp_path / "logs" / "progress.csv").read_text()
+    assert (tmp_path / "pool_final.npz").exists() == numpy_inference
+
+
+def test_split_cores_keeps_evaluation_off_the_training_cores(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False)
+    assert split_cores(2) == ([0, 1], [2, 3])
+    assert split_cores(4) == ([0, 1, 2, 3], None)
@@ -0,0 +1,53 @@
+import math
+import random
+
+import pytest
+
+from table import Table
+
+
+def play(positions, angle, fast_forward):
+    random.seed(0)
+    table = Table(len(positions), fast_forward=fast_forward)
+    table.reset()
+    for ball, pos in zip(table.balls, positions):
+        ball.body.position = pos
+    table.shot_angle = lambda action: angle
+    table.make_shot(0)
+    return table
+
+
+def test_fast_forward_pockets_at_the_same_substep():
+    positions = [(150, 150), (900, 400)]
+    full = play(positions, -3 * math.pi / 4, fast_forward=False)
+    fast = play(positions, -3 * math.pi / 4, fast_forward=True)
+
+    assert full.logging["pocket_events"] == [(0, 0, full.logging["pocket_events"][0][2])]
+    assert fast.logging["pocket_events"] == full.logging["pocket_events"]
+    assert fast.substep == full.substep
+    assert fast.cue_ball is not None and not fast.cue_ball.pocketed
+
+
+def test_fast_forward_stops_where_the_simulation_does():
+    positions = [(300, 320), (900, 100), (900, 540)]
+    full = play(positions, 0.1, fast_forward=False)
+    fast = play(positions, 0.1, fast_forward=True)
+    assert fast.substep == full.substep
+    for a, b in zip(full.balls, fast.balls):
+        assert a.body.position.get_distance(b.body.position) < 1e-9
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_seeded_shots_match_full_simulation(seed):
+    tables = []
+    for fast_forward in (False, True):
+        random.seed(seed)
+        table = Table(6, fast_forward=fast_forward)
+        table.reset()
+        table.make_shot(random.randrange(30))
+        tables.append(table)
+    full, fast = tables
+    assert fast.substep == full.substep
+    assert fast.logging["pocket_events"] == full.logging["pocket_events"]
+    for a, b in zip(full.balls, fast.balls):
+        assert a.body.position.get_distance(b.body.position) < 1e-9
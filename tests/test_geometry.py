@@ -0,0 +1,26 @@
+import numpy as np
+
+from const import POCKETS
+from geometry import aim_geometry, pot_possibility
+
+
+def test_kernels_match_scalar_geometry(random_tables):
+    for n in (2, 4, 7):
+        for table in random_tables(n, 40, seed=n, touching=True):
+            positions, pocketed, _ = table.layout()
+            angles, straightness = aim_geometry(positions, pocketed)
+            possible = pot_possibility(positions, pocketed)
+            num_actions = (n - 1) * len(POCKETS)
+            for action in range(num_actions):
+                np.testing.assert_allclose(angles[action], table.calc_angle(action), atol=1e-9)
+                np.testing.assert_allclose(straightness[action], table.get_straightness(action), atol=1e-9)
+                assert possible[action] == table.is_pot_possible(action)
+
+
+def test_geometry_is_cached_per_layout(random_tables):
+    table = next(random_tables(4, 1, seed=4, touching=True))
+    aim, possibility = table.get_aim(), table.get_possibility()
+    table.get_observation()
+    assert table.get_aim() is aim and table.get_possibility() is possibility
+    table.make_shot(0)
+    assert table.get_aim() is not aim and table.get_possibility() is not possibility
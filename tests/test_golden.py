@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import golden
+from table import Table
+
+
+def shifted_table(n, large_rack):
+    """A backend that aims every shot slightly off."""
+    table = Table(n, large_rack=large_rack)
+    shot_angle = table.shot_angle
+    table.shot_angle = lambda action: shot_angle(action) + 0.05
+    return table
+
+
+@pytest.fixture(scope="module")
+def golden_set(tmp_path_factory):
+    path = tmp_path_factory.mktemp("golden") / "golden.npz"
+    golden.record(str(path), 3, 12, seed=1)
+    return golden.load(str(path))
+
+
+def test_record_round_trips(golden_set):
+    assert golden_set["meta"]["n"] == 3
+    assert golden_set["final_positions"].shape == (12, 3, 2)
+    assert golden_set["observations"].shape[0] == 12
+
+
+def test_reference_and_fast_forward_pass(golden_set):
+    rows = golden.check(golden_set, ["pymunk", "fast_forward"])
+    for name, shot_time, obs_time, report in rows:
+        assert report["passed"], (name, report)
+        assert shot_time > 0 and obs_time > 0
+    assert rows[0][3]["max_position_err"] == 0
+
+
+def test_divergent_backend_fails(golden_set):
+    golden.BACKENDS["shifted"] = shifted_table
+    try:
+        (_, _, _, report), = golden.check(golden_set, ["shifted"])
+    finally:
+        del golden.BACKENDS["shifted"]
+    assert not report["passed"]
+    assert report["position_mismatches"] > 0
+
+
+def test_backend_by_module_path():
+    assert golden.get_backend("table:Table") is Table
+    with pytest.raises(ValueError):
+        golden.get_backend("nonexistent")
@@ -0,0 +1,63 @@
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+
+from episodes import run_episodes
+from numpy_policy import NumpyPolicy, export_policy
+from pool_env import PoolEnv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("policy")
+    model = PPO("MlpPolicy", PoolEnv(3), n_steps=32, batch_size=32, n_epochs=1, seed=0, device="cpu")
+    model.learn(64)
+    model_path = str(directory / "model.zip")
+    model.save(model_path)
+    return model, model_path, export_policy(model_path, str(directory / "model.npz"))
+
+
+def observations(n, count):
+    random.seed(0)
+    env = PoolEnv(n)
+    return np.array([env.reset()[0] for _ in range(count)])
+
+
+def test_actions_match_the_torch_policy(exported):
+    model, _, npz_path = exported
+    obs = observations(3, 300)
+    expected = model.predict(obs, deterministic=True)[0]
+    for dtype in ("float64", "float32"):
+        policy = NumpyPolicy.load(npz_path, dtype)
+        np.testing.assert_array_equal(policy.predict(obs), expected)
+        assert policy.predict(obs[0]) == expected[0]
+    int8 = NumpyPolicy.load(npz_path, "int8")
+    assert np.mean(int8.predict(obs) == expected) > 0.9
+    # Dequantized once at load: the forward pass uses float32 weights on an 8-bit grid per output.
+    for w in int8.weights:
+        assert w.dtype == np.float32
+        assert all(len(np.unique(column)) <= 255 for column in w.T)
+
+
+def test_evaluation_runs_exported_policies(exported):
+    _, model_path, npz_path = exported
+    assert run_episodes(npz_path, 3, [0, 1], max_steps=10) == run_episodes(model_path, 3, [0, 1], max_steps=10)
+
+
+def test_inference_does_not_import_torch(exported):
+    _, _, npz_path = exported
+    script = (
+        "import sys\n"
+        "from episodes import init_eval_worker, run_episodes\n"
+        "init_eval_worker(None)\n"
+        f"run_episodes({npz_path!r}, 3, [0], max_steps=3)\n"
+        "assert 'torch' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, capture_output=True)
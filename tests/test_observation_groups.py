@@ -0,0 +1,57 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+import table as table_module
+from const import OBSERVATION_GROUPS
+from pool_env import PoolEnv
+
+
+def test_groups_are_slices_of_the_full_observation():
+    random.seed(0)
+    env = PoolEnv(4)
+    env.reset()
+    full = env.table.get_observation()
+    assert full.shape == env.observation_space.shape
+    offsets = {}
+    start = 0
+    for group in OBSERVATION_GROUPS:
+        size = env.table.observation_size((group,))
+        offsets[group] = slice(start, start + size)
+        start += size
+    assert start == len(full)
+    for groups in itertools.combinations(OBSERVATION_GROUPS, 2):
+        expected = np.concatenate([full[offsets[group]] for group in groups])
+        # Order given does not matter; groups are always concatenated in OBSERVATION_GROUPS order.
+        np.testing.assert_array_equal(env.table.get_observation(groups[::-1]), expected)
+
+
+def test_unrequested_groups_are_not_computed(monkeypatch):
+    def fail(*args):
+        raise AssertionError("computed an unrequested group")
+
+    monkeypatch.setattr(table_module, "pot_possibility", fail)
+    monkeypatch.setattr(table_module.Table, "calculate_cue_pos", fail)
+    random.seed(1)
+    env = PoolEnv(4, observation_groups=("balls", "straightness"))
+    obs, _ = env.reset()
+    assert obs.shape == env.observation_space.shape == (env.table.observation_size(("balls", "straightness")),)
+    for action in range(5):
+        obs, _, done, _, _ = env.step(action)
+        assert obs.shape == env.observation_space.shape
+        if done:
+            env.reset()
+
+
+def test_group_times_are_reported():
+    env = PoolEnv(3, telemetry=True, observation_groups=("time", "possibility"))
+    env.reset()
+    _, _, _, _, info = env.step(0)
+    assert set(info["telemetry"]["obs_group_times"]) == {"time", "possibility"}
+
+
+def test_unknown_group_is_rejected():
+    with pytest.raises(ValueError):
+        PoolEnv(3, observation_groups=("time", "velocity"))
@@ -0,0 +1,36 @@
+import pytest
+
+from const import PHYSICS_PRESETS
+from table import Table
+
+
+def roll_distance(preset, speed=600):
+    table = Table(2, preset=preset)
+    table.reset()
+    table.balls[0].body.position = (100, 320)
+    table.balls[1].body.position = (100, 100)
+    table.reset_logging()
+    table.cue_ball.body.velocity = (speed, 0)
+    while not table.check_stop():
+        table.space.step(table.timestep)
+        table.apply_friction()
+    return table.cue_ball.body.position.x - 100
+
+
+def test_default_preset_keeps_the_original_physics():
+    table = Table(2)
+    assert table.timestep == 1 / 300
+    assert table.space.iterations == 10
+    assert table.settle_speed == 0
+    assert table.friction_dt == 1 / 60
+
+
+@pytest.mark.parametrize("preset", sorted(PHYSICS_PRESETS))
+def test_friction_is_per_simulated_second_across_presets(preset):
+    reference = roll_distance("default")
+    assert roll_distance(preset) == pytest.approx(reference, rel=0.03)
+
+
+def test_unknown_preset_is_rejected():
+    with pytest.raises(KeyError):
+        Table(2, preset="ultra")
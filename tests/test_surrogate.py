@@ -0,0 +1,105 @@
+import random
+
+import numpy as np
+import torch
+from stable_baselines3 import PPO
+from stable_baselines3.common.logger import configure
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from const import BALL_RADIUS, FIELD
+from surrogate import DynaCallback, DynaEnv, Surrogate, TransitionBuffer, collect, shot_outcome, table_state
+from table import Table, is_point_outside_polygon
+
+
+def test_apply_outcome_ends_a_shot_like_make_shot():
+    random.seed(0)
+    table = Table(4)
+    table.reset()
+    positions, pocketed = table_state(table)
+    positions[1] = (200, 300)
+    table.apply_outcome(positions, np.array([False, False, True, False]))
+    assert tuple(table.balls[1].body.position) == (200, 300)
+    assert table.balls[2].pocketed and table.logging["white_pocketed"]
+    assert [event[0] for event in table.logging["pocket_events"]] == [2]
+    assert table.get_reward() == 100
+    after_positions, after_pocketed = shot_outcome(table)
+    assert after_pocketed.tolist() == [False, False, True, False]
+
+
+def test_apply_outcome_pushes_apart_overlapping_balls_only():
+    random.seed(0)
+    table = Table(4)
+    table.reset()
+    positions = np.array([(600, 300), (610, 300), (900, 500), (400, 100)], dtype=np.float64)
+    table.apply_outcome(positions, np.zeros(4, dtype=bool))
+    placed = np.array([ball.body.position for ball in table.balls])
+    assert np.linalg.norm(placed[0] - placed[1]) >= 2 * BALL_RADIUS - 0.5
+    assert tuple(placed[2]) == (900, 500)
+    assert not table.logging["pocket_events"]
+    assert all(not is_point_outside_polygon(p, FIELD) for p in placed)
+
+
+def test_predictions_stay_inside_the_field():
+    model = Surrogate(4, 2, 6)
+    obs = np.zeros(4, dtype=np.float32)
+    positions = np.array([(14, 14), (1266, 626)], dtype=np.float32)
+    next_positions, _ = model.predict(obs, positions, np.zeros(2, dtype=bool), 0)
+    assert all(not is_point_outside_polygon(p, FIELD) for p in next_positions)
+
+
+def test_accuracy_checks_use_the_env_physics_and_leave_global_random_alone():
+    env = DynaEnv(3, preset="fast", check_every=1)
+    assert env.checker.timestep == env.table.timestep
+    random.seed(1)
+    env.reset()
+    positions, pocketed = table_state(env.table)
+    state = random.getstate()
+    env.check(positions, pocketed, 0, (positions, pocketed))
+    assert random.getstate() == state and env.stats["checks"] == 1
+
+
+def test_buffer_wraps_around():
+    buffer = TransitionBuffer(3, 2, capacity=4)
+    for i in range(6):
+        buffer.add(np.full(3, i), np.zeros((2, 2)), np.zeros(2, bool), i, np.zeros((2, 2)), np.zeros(2, bool))
+    assert buffer.size == 4
+    assert sorted(buffer.arrays()[3]) == [2, 3, 4, 5]
+
+
+def test_surrogate_learns_and_keeps_pocketed_balls_pocketed():
+    torch.manual_seed(0)
+    buffer = collect(3, 300, seed=0)
+    model = Surrogate(buffer.obs.shape[1], 3, 12)
+    first = model.fit(buffer, steps=1)
+    last = model.fit(buffer, steps=300)
+    assert last < first
+    obs, positions, pocketed, actions, _, _ = buffer.arrays()
+    pocketed = pocketed[0].copy()
+    pocketed[2] = True
+    next_positions, next_pocketed = model.predict(obs[0], positions[0], pocketed, actions[0])
+    assert next_positions.shape == (3, 2) and next_pocketed[2]
+
+
+def test_dyna_env_mixes_imagined_and_real_shots():
+    random.seed(0)
+    env = DynaEnv(3, imagine_ratio=0.5, warmup=30, retrain_every=30, check_every=3)
+    obs, _ = env.reset()
+    for _ in range(150):
+        obs, reward, done, _, info = env.step(env.action_space.sample())
+        assert obs.shape == env.observation_space.shape
+        if done:
+            obs, _ = env.reset()
+    stats = info["dyna"]
+    assert stats["real_shots"] + stats["imagined_shots"] == 150
+    assert 30 < stats["real_shots"] < 150
+    assert stats["checks"] == stats["imagined_shots"] // 3 > 0
+    assert 0 <= stats["check_pots_agree"] <= stats["checks"]
+
+
+def test_callback_logs_dyna_metrics(tmp_path):
+    env = DummyVecEnv([lambda: DynaEnv(2, warmup=8, retrain_every=8, check_every=1)])
+    model = PPO("MlpPolicy", env, n_steps=16, batch_size=16, n_epochs=1, seed=0, device="cpu")
+    model.set_logger(configure(str(tmp_path), ["csv"]))
+    model.learn(48, callback=DynaCallback())
+    header = (tmp_path / "progress.csv").read_text().splitlines()[0]
+    assert "dyna/imagined_fraction" in header and "dyna/check_pot_agreement" in header
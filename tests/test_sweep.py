@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+import sweep
+from sweep import CpuPool, cpus_needed, expand_spec, prepare, run_sweep
+
+TINY = {"num_balls": 2, "num_cpu": 1, "total_timesteps": 64, "n_steps": 32, "batch_size": 32, "n_epochs": 1,
+        "eval_episodes": 2, "eval_max_steps": 3}
+
+
+def test_grid_spec_covers_every_combination():
+    configs = expand_spec({"base": {"num_balls": 3}, "params": {"gamma": [0.9, 0.99], "n_epochs": [1, 2, 3]}})
+    assert len(configs) == 6
+    assert {(c["gamma"], c["n_epochs"]) for c in configs} == {(g, e) for g in (0.9, 0.99) for e in (1, 2, 3)}
+    assert all(c["num_balls"] == 3 and c["batch_size"] == 64 for c in configs)
+
+
+def test_random_spec_is_reproducible():
+    spec = {"method": "random", "num_trials": 5, "seed": 3,
+            "params": {"learning_rate": {"log_uniform": [1e-5, 1e-3]}, "n_steps": [256, 512], "n_epochs": {"int": [1, 4]}}}
+    configs = expand_spec(spec)
+    assert configs == expand_spec(spec)
+    assert all(1e-5 <= c["learning_rate"] <= 1e-3 and c["n_steps"] in (256, 512) for c in configs)
+    with pytest.raises(ValueError):
+        expand_spec({"params": {"learning_rat": [1]}})
+
+
+def test_cpu_pool_hands_out_disjoint_sets():
+    pool = CpuPool(range(8))
+    a = pool.take(cpus_needed(dict(sweep.DEFAULT_CONFIG, num_cpu=4), 8))
+    b = pool.take(3)
+    assert len(a) == 5 and not set(a) & set(b)
+    assert pool.take(1) is None
+    pool.give(a)
+    assert len(pool.take(5)) == 5
+    assert cpus_needed(dict(sweep.DEFAULT_CONFIG, num_cpu=16), 8) == 8
+    assert cpus_needed(dict(sweep.DEFAULT_CONFIG, num_cpu=1), 8) == 1
+
+
+def test_sweep_runs_resumes_and_summarizes(tmp_path, monkeypatch):
+    monkeypatch.setattr(sweep, "POLL_INTERVAL", 0.1)
+    spec = {"base": TINY, "params": {"gamma": [0.9, 0.99]}}
+    sweep_dir = tmp_path / "sweep"
+    rows = run_sweep(spec, str(sweep_dir), cpus=[0], verbose=0)
+    assert [row["status"] for row in rows] == ["done", "done"]
+    assert rows[0]["gamma"] == 0.9 and rows[0]["steps_per_sec"] > 0
+    assert "clear_rate" in rows[1]
+    assert (sweep_dir / "summary.csv").read_text().splitlines()[0].startswith("trial,gamma,")
+
+    # Only the trial without a result runs again, also after the sweep directory moved,
+    # and the resumed trial logs to TensorBoard in its new place.
+    os.remove(sweep_dir / "trial_001" / "result.json")
+    finished = os.path.getmtime(sweep_dir / "trial_000" / "result.json")
+    sweep_dir = sweep_dir.rename(tmp_path / "moved")
+    rows = run_sweep({"base": TINY, "params": {"gamma": [0.5]}}, str(sweep_dir), cpus=[0], verbose=0)
+    assert len(rows) == 2 and all(row["status"] == "done" for row in rows)
+    assert os.path.getmtime(sweep_dir / "trial_000" / "result.json") == finished
+    assert json.loads((sweep_dir / "trial_001" / "config.json").read_text())["gamma"] == 0.99
+    assert not (tmp_path / "sweep").exists()
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from const import HEIGHT, OBSERVATION_GROUPS, POCKETS, WIDTH
+from pool_env import PoolEnv
+from symmetry import MIRRORS, ObservationMirror, enable_symmetry, mirror_actions, pocket_permutation
+
+
+def mirror_table(table, mirror):
+    flip_x, flip_y = MIRRORS[mirror]
+    for ball in table.balls:
+        if ball.pocketed:
+            continue
+        x, y = ball.body.position
+        ball.body.position = (WIDTH - x if flip_x else x, HEIGHT - y if flip_y else y)
+
+
+def assert_observations_match(actual, expected):
+    diff = np.abs(actual.astype(np.float64) - expected)
+    # Angles of +pi and -pi are the same direction.
+    diff = np.minimum(diff, np.abs(diff - 2 * np.pi))
+    assert diff.max() < 1e-3
+
+
+def test_pocket_permutations_are_involutions():
+    for mirror in MIRRORS:
+        perm = pocket_permutation(mirror)
+        assert sorted(perm) == list(range(len(POCKETS)))
+        np.testing.assert_array_equal(perm[perm], np.arange(len(POCKETS)))
+    actions = np.arange(3 * len(POCKETS))
+    np.testing.assert_array_equal(mirror_actions(mirror_actions(actions, "x"), "x"), actions)
+
+
+@pytest.mark.parametrize("mirror", list(MIRRORS))
+@pytest.mark.parametrize("groups", [OBSERVATION_GROUPS, ("cue",), ("balls", "possibility")])
+def test_mirrored_observations_match_the_mirrored_table(mirror, groups, random_tables):
+    n = 5
+    mirror_obs = ObservationMirror(n, groups)
+    for table in random_tables(n, 30):
+        obs = table.get_observation(groups)
+        angles = table.get_aim()[0].copy()
+        mirror_table(table, mirror)
+        expected = table.get_observation(groups)
+        assert_observations_match(mirror_obs(obs, mirror), expected)
+
+        # The remapped action aims at the mirrored ghost ball.
+        flip_x, flip_y = MIRRORS[mirror]
+        mirrored = mirror_actions(np.arange(len(angles)), mirror)
+        for action, mirrored_action in enumerate(mirrored):
+            if table.balls[1 + action // len(POCKETS)].pocketed:
+                continue
+            angle = angles[action]
+            expected_angle = np.arctan2(-np.sin(angle) if flip_y else np.sin(angle),
+                                        -np.cos(angle) if flip_x else np.cos(angle))
+            got = table.shot_angle(int(mirrored_action))
+            assert abs((got - expected_angle + np.pi) % (2 * np.pi) - np.pi) < 1e-6
+
+
+def test_rollout_buffer_is_augmented():
+    random.seed(0)
+    env = DummyVecEnv([lambda: PoolEnv(3) for _ in range(2)])
+    model = PPO("MlpPolicy", env, n_steps=8, batch_size=16, n_epochs=1, seed=0, device="cpu")
+    enable_symmetry(model, 3)
+    model.learn(8)
+
+    buffer = model.rollout_buffer
+    assert buffer.n_envs == 2 * (1 + len(MIRRORS))
+    # Training flattened the buffer env-major: mirrored copies follow the real envs.
+    obs = buffer.observations.reshape(buffer.n_envs, buffer.buffer_size, -1)
+    mirror_obs = ObservationMirror(3)
+    np.testing.assert_array_equal(obs[2:4], mirror_obs(obs[:2], "x"))
+    actions = buffer.actions.reshape(buffer.n_envs, buffer.buffer_size)
+    np.testing.assert_array_equal(actions[6:8], mirror_actions(actions[:2].astype(int), "xy"))
+    np.testing.assert_array_equal(buffer.returns.reshape(buffer.n_envs, -1)[4:6], buffer.returns.reshape(buffer.n_envs, -1)[:2])
+
+    # The next rollout starts from a buffer of the real size again.
+    model.learn(8, reset_num_timesteps=False)
+    assert buffer.n_envs == 2 * (1 + len(MIRRORS))
@@ -0,0 +1,89 @@
+import math
+import os
+import random
+import sys
+
+from const import FIELD, SHOOT_FORCE
+from table import Table, is_point_outside_polygon
+
+
+def make_table(n, positions):
+    random.seed(0)
+    table = Table(n)
+    table.reset()
+    for ball, pos in zip(table.balls, positions):
+        ball.body.position = pos
+    table.reset_logging()
+    return table
+
+
+def first_substep_outside(n, positions, action, index):
+    """Replays a shot without pocket capture and returns the substep the ball leaves FIELD."""
+    table = make_table(n, positions)
+    angle = table.calc_angle(action)
+    table.cue_ball.body.apply_impulse_at_local_point((SHOOT_FORCE * math.cos(angle), SHOOT_FORCE * math.sin(angle)))
+    for substep in range(1, 10000):
+        table.space.step(1/300)
+        table.apply_friction()
+        if is_point_outside_polygon(table.balls[index].body.position, FIELD):
+            return substep
+    return None
+
+
+def test_ball_is_captured_at_the_substep_it_leaves_the_field():
+    positions = [(300, 300), (100, 100)]
+    expected = first_substep_outside(2, positions, 0, 1)
+    assert expected is not None
+
+    table = make_table(2, positions)
+    table.make_shot(0)
+
+    assert table.balls[1].pocketed
+    assert table.logging["white_pocketed"]
+    assert (1, 0, expected) in table.logging["pocket_events"]
+    assert table.balls[1].body not in table.space.bodies
+
+
+def test_pocketed_cue_ball_is_respotted_after_the_shot():
+    # Out-of-range actions shoot along +x, sending the cue ball into the top-right pocket.
+    table = make_table(2, [(1150, 20), (300, 320)])
+    old_cue = table.cue_ball
+    table.make_shot(6)
+
+    assert table.logging["red_pocketed"]
+    assert table.logging["pocket_events"][0][:2] == (0, 2)
+    assert table.cue_ball is not old_cue
+    assert table.balls[0] is table.cue_ball
+    assert not table.cue_ball.pocketed
+    assert table.cue_ball.body in table.space.bodies
+    assert not is_point_outside_polygon(table.cue_ball.body.position, FIELD)
+
+
+def test_balls_on_the_cushion_are_not_near_a_pocket():
+    table = make_table(2, [(300, 15), (600, 320)])
+    table.make_shot(6)
+    assert not table.logging["pocket_events"]
+    assert not table.near_pocket
+
+
+def test_large_rack_places_every_ball_without_overlap():
+    for n in (16, 50):
+        table = Table(n, large_rack=True)
+        table.reset()
+        assert len(table.balls) == n
+        assert table.balls[0] is table.cue_ball
+        positions = [ball.body.position for ball in table.balls]
+        for i, a in enumerate(positions):
+            assert not is_point_outside_polygon(a, FIELD)
+            for b in positions[i + 1:]:
+                assert a.get_distance(b) >= 2 * 14
+        table.make_shot(0)
+        assert table.check_stop()
+
+
+def test_large_rack_solver_threads_follow_the_core_budget(monkeypatch):
+    assert not Table(16, large_rack=True, solver_threads=1).space.threaded
+    if sys.platform != "win32":
+        assert Table(16, large_rack=True, solver_threads=2).space.threads == 2
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0}, raising=False)
+    assert not Table(16, large_rack=True).space.threaded
@@ -0,0 +1,36 @@
+from stable_baselines3 import PPO
+from stable_baselines3.common.logger import configure
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from pool_env import PoolEnv
+from telemetry import TelemetryCallback
+
+
+def test_step_reports_telemetry_only_when_enabled():
+    env = PoolEnv(2)
+    env.reset()
+    assert "telemetry" not in env.step(0)[4]
+
+    env = PoolEnv(2, telemetry=True)
+    env.reset()
+    env.step(0)
+    data = env.step(0)[4]["telemetry"]
+    assert data["shot_time"] > 0
+    assert data["obs_time"] > 0
+    assert data["idle_time"] >= 0
+    assert data["rss"] > 0
+
+
+def test_callback_logs_per_worker_metrics(tmp_path):
+    env = DummyVecEnv([lambda: PoolEnv(2, telemetry=True) for _ in range(2)])
+    model = PPO("MlpPolicy", env, n_steps=8, batch_size=16, n_epochs=1, seed=0, device="cpu")
+    model.set_logger(configure(str(tmp_path), ["csv", "tensorboard"]))
+    model.learn(48, callback=TelemetryCallback())
+
+    header = (tmp_path / "progress.csv").read_text().splitlines()[0].split(",")
+    for key in ("telemetry/rollout_time", "telemetry/update_time", "telemetry/env_steps_per_sec",
+                "telemetry/worker_0/steps_per_sec", "telemetry/worker_1/idle_fraction",
+                "telemetry/worker_1/rss_mb", "telemetry/mean_shot_ms", "telemetry/learner_rss_mb",
+                "telemetry/obs_group_ms/possibility"):
+        assert key in header
+    assert "telemetry/shot_time_ms" not in header
@@ -0,0 +1,64 @@
+import random
+import time
+
+import numpy as np
+
+from const import RED
+from pool_env import PoolEnv
+from viewer import Viewer, ViewerPublisher, ViewerWrapper, decode_update, encode_update
+
+
+def wait_for_updates(viewer, count):
+    received = 0
+    deadline = time.monotonic() + 2
+    while received < count and time.monotonic() < deadline:
+        received += viewer.poll()
+    return received
+
+
+def test_update_round_trips():
+    positions = np.array([[10.5, 20.25], [300.0, 400.0]])
+    table_id, shots, decoded, pocketed = decode_update(encode_update(3, 7, positions, [False, True]))
+    assert (table_id, shots) == (3, 7)
+    np.testing.assert_array_equal(decoded, positions.astype(np.float32))
+    assert pocketed.tolist() == [False, True]
+
+
+def test_publisher_does_not_block_without_viewer():
+    random.seed(0)
+    env = ViewerWrapper(PoolEnv(3), 0, ("127.0.0.1", 9))
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(5):
+        env.step(0)
+    assert time.perf_counter() - start < 5
+    env.close()
+
+
+def test_viewer_draws_published_tables():
+    viewer = Viewer(4, ("127.0.0.1", 0), tile_width=256)
+    try:
+        assert viewer.draw()  # every tile is drawn once up front
+        random.seed(1)
+        env = ViewerWrapper(PoolEnv(3), 2, viewer.address)
+        env.reset()
+        assert wait_for_updates(viewer, 1) == 1
+        rects = viewer.draw()
+        assert rects == [viewer.tile_rect(2)]
+
+        shots, positions, pocketed = viewer.states[2]
+        assert shots == 0
+        cue = env.unwrapped.table.cue_ball.body.position
+        np.testing.assert_allclose(positions[0], cue, atol=1e-3)
+        rect = viewer.tile_rect(2)
+        x, y = (round(c * viewer.scale) for c in cue)
+        assert tuple(viewer.screen.get_at((rect.x + x, rect.y + y)))[:3] == RED
+
+        env.step(0)
+        assert wait_for_updates(viewer, 1) == 1
+        assert viewer.states[2][0] == 1
+        assert viewer.draw() == [viewer.tile_rect(2)]
+        assert viewer.draw() == []
+        env.close()
+    finally:
+        viewer.close()
@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+
+from worker_pool import TEMPLATES, WARM_BALLS_VAR, build_templates, make_env, make_vec_env, take_env, time_to_first_step
+
+
+def test_template_is_taken_once():
+    build_templates("3,4")
+    template = TEMPLATES[4]
+    try:
+        env = take_env(4, telemetry=True)
+        assert env is template and env.telemetry
+        assert 4 not in TEMPLATES
+        other = take_env(4)
+        assert other is not template and other.num_balls == 4
+        other.close()
+    finally:
+        TEMPLATES.clear()
+
+
+def test_forkserver_workers_step():
+    vec_env, elapsed = time_to_first_step(lambda: make_vec_env([make_env(3) for _ in range(2)], [3]))
+    try:
+        assert elapsed > 0
+        assert vec_env.get_attr("num_balls") == [3, 3]
+        assert WARM_BALLS_VAR not in os.environ
+        obs, rewards, dones, infos = vec_env.step(np.zeros(2, dtype=np.int64))
+        assert obs.shape == (2,) + vec_env.observation_space.shape
+        # The probe step was undone by a reset, so this is every table's first shot.
+        assert obs[:, 0].tolist() == [1, 1]
+    finally:
+        vec_env.close()
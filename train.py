@@ -13,12 +13,20 @@ try:
     from stable_baselines3 import PPO
     from stable_baselines3.common.env_util import make_vec_env
     from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecNormalize
-    from stable_baselines3.common.callbacks import CheckpointCallback, EvalCallback
+    from stable_baselines3.common.callbacks import CallbackList
     from stable_baselines3.common.monitor import Monitor
 except ImportError:
     print("Error: Could not import Stable Baselines3 components.")
     print("Please install stable-baselines3: pip install stable-baselines3[extra]")
     exit()
+from checkpointing import BackgroundCheckpointCallback, latest_checkpoint
+from evaluation import PeriodicEvaluator, split_cores
+from const import OBSERVATION_GROUPS
+from telemetry import TelemetryCallback
+from surrogate import DynaCallback, DynaEnv
+from symmetry import enable_symmetry
+from viewer import ViewerWrapper, start_viewer
+from worker_pool import make_vec_env as make_warm_vec_env, take_env, time_to_first_step
 
 
 if __name__ == "__main__":
@@ -29,6 +37,29 @@ if __name__ == "__main__":
     LOG_DIR = "./pool_logs/"
     MODEL_SAVE_DIR = "./pool_models/"
     SAVE_FREQ = 100000
+    # Continue from the newest complete checkpoint in MODEL_SAVE_DIR, if there is one.
+    RESUME = False
+    # Checkpoints are evaluated in a separate process pool on its own cores while training continues.
+    EVAL_FREQ = 100000
+    EVAL_EPISODES = 100
+    EVAL_WORKERS = 2
+    # Log per-worker throughput, shot/observation times and memory to TensorBoard.
+    TELEMETRY = False
+    # Actors step their own tables and a V-trace learner consumes their segments asynchronously.
+    ACTOR_LEARNER = False
+    # Feature groups the policy observes; groups left out are never computed.
+    OBS_GROUPS = OBSERVATION_GROUPS
+    # Train on each rollout plus its three mirror images of the table.
+    SYMMETRY = False
+    # Answer this share of shots with a learned outcome model instead of pymunk (0 disables).
+    DYNA_RATIO = 0.0
+    # Start every episode after a break from the full triangle, reusing breaks cached on disk.
+    BREAK_SHOT = False
+    BREAK_CACHE_PATH = os.path.join(MODEL_SAVE_DIR, f"breaks_n{NUM_BALLS}.npz")
+    # Show every env worker's table in a separate live viewer window.
+    VIEWER = False
+    # Fork env workers from a server with the heavy modules imported and a PoolEnv pre-built.
+    WARM_POOL = False
 
     os.makedirs(LOG_DIR, exist_ok=True)
     os.makedirs(MODEL_SAVE_DIR, exist_ok=True)
@@ -36,61 +67,120 @@ if __name__ == "__main__":
     print(f"Starting training for {NUM_BALLS} balls.")
     print(f"Using {NUM_CPU} parallel environments.")
     print(f"Total timesteps: {TOTAL_TIMESTEPS}")
+    if ACTOR_LEARNER:
+        from actor_learner import train
+        print(f"Using {NUM_CPU} actor processes with an asynchronous learner.")
+        model = train(NUM_BALLS, NUM_CPU, TOTAL_TIMESTEPS, log_dir=LOG_DIR, tb_log_name=MODEL_NAME)
+        final_model_path = os.path.join(MODEL_SAVE_DIR, f"{MODEL_NAME}_final")
+        print(f"Saving final model to: {final_model_path}")
+        model.save(final_model_path)
+        print(f"To view logs, run: tensorboard --logdir {LOG_DIR}")
+        exit()
+    # Evaluation workers get the last EVAL_WORKERS cores; training and its env workers the rest.
+    TRAIN_CPUS, EVAL_CPUS = split_cores(EVAL_WORKERS)
+    if EVAL_CPUS is not None:
+        os.sched_setaffinity(0, TRAIN_CPUS)
+        print(f"Training on cores {TRAIN_CPUS}, evaluating on cores {EVAL_CPUS}.")
+
     def make_env(rank, seed=0):
         def _init():
-            env = PoolEnv(n=NUM_BALLS)
+            if DYNA_RATIO > 0:
+                env = DynaEnv(NUM_BALLS, imagine_ratio=DYNA_RATIO, seed=seed + rank, telemetry=TELEMETRY,
+                              observation_groups=OBS_GROUPS)
+            elif BREAK_SHOT:
+                env = PoolEnv(NUM_BALLS, telemetry=TELEMETRY, observation_groups=OBS_GROUPS, break_shot=True,
+                              break_cache=BREAK_CACHE_PATH)
+            else:
+                env = take_env(NUM_BALLS, telemetry=TELEMETRY, observation_groups=OBS_GROUPS)
 
+            if VIEWER:
+                env = ViewerWrapper(env, rank)
             log_file_path = os.path.join(LOG_DIR, f"monitor_{rank}")
             env = Monitor(env, filename=log_file_path)
             return env
         return _init
-    if NUM_CPU > 1:
+    if VIEWER:
+        start_viewer(NUM_CPU)
+    if NUM_CPU > 1 and WARM_POOL:
+        print("Using SubprocVecEnv with a pre-warmed fork server.")
+        make = lambda: make_warm_vec_env([make_env(i) for i in range(NUM_CPU)], [NUM_BALLS])
+    elif NUM_CPU > 1:
         print("Using SubprocVecEnv for parallel environments.")
-        vec_env = SubprocVecEnv([make_env(i) for i in range(NUM_CPU)])
+        make = lambda: SubprocVecEnv([make_env(i) for i in range(NUM_CPU)])
     else:
         print("Using DummyVecEnv for a single environment.")
-        vec_env = DummyVecEnv([make_env(0)])
-    model = PPO(
-        "MlpPolicy",
-        vec_env,
-        verbose=1,
-        n_steps=2048,
-        batch_size=64,
-        n_epochs=10,
-        gamma=0.99,
-        gae_lambda=0.95,
-        clip_range=0.2,
-        ent_coef=0.0,
-        learning_rate=3e-4,
-        tensorboard_log=LOG_DIR,
-        device="auto"           
-    )
+        make = lambda: DummyVecEnv([make_env(0)])
+    vec_env, cold_start = time_to_first_step(make)
+    print(f"Env workers took their first step after {cold_start:.2f} s.")
+    resume_path = latest_checkpoint(MODEL_SAVE_DIR, MODEL_NAME) if RESUME else None
+    if resume_path is not None:
+        print(f"Resuming from checkpoint: {resume_path}")
+        model = PPO.load(resume_path, env=vec_env, tensorboard_log=LOG_DIR, device="auto")
+    else:
+        model = PPO(
+            "MlpPolicy",
+            vec_env,
+            verbose=1,
+            n_steps=2048,
+            batch_size=64,
+            n_epochs=10,
+            gamma=0.99,
+            gae_lambda=0.95,
+            clip_range=0.2,
+            ent_coef=0.0,
+            learning_rate=3e-4,
+            tensorboard_log=LOG_DIR,
+            device="auto"           
+        )
+
+    if SYMMETRY:
+        enable_symmetry(model, NUM_BALLS, OBS_GROUPS)
 
     print(f"PPO Model Created. Policy architecture: {model.policy}")
     print(f"Logging to: {LOG_DIR}")
     print(f"Saving models to: {MODEL_SAVE_DIR}")
 
-    checkpoint_callback = CheckpointCallback(
+    checkpoint_callback = BackgroundCheckpointCallback(
         save_freq=max(SAVE_FREQ // NUM_CPU, 1),
         save_path=MODEL_SAVE_DIR,
         name_prefix=MODEL_NAME
     )
 
+    eval_callback = PeriodicEvaluator(
+        checkpoint_callback,
+        num_balls=NUM_BALLS,
+        eval_freq=EVAL_FREQ,
+        num_episodes=EVAL_EPISODES,
+        num_workers=EVAL_WORKERS,
+        cpus=EVAL_CPUS,
+        observation_groups=OBS_GROUPS,
+        verbose=1
+    )
+
+    callbacks = [checkpoint_callback, eval_callback]
+    if TELEMETRY:
+        callbacks.append(TelemetryCallback())
+    if DYNA_RATIO > 0:
+        callbacks.append(DynaCallback())
+
     print("Starting Training...")
     try:
         model.learn(
-            total_timesteps=TOTAL_TIMESTEPS,
-            callback=checkpoint_callback,
+            total_timesteps=max(TOTAL_TIMESTEPS - model.num_timesteps, 0),
+            callback=CallbackList(callbacks),
             log_interval=1,
-            tb_log_name=MODEL_NAME 
+            tb_log_name=MODEL_NAME,
+            reset_num_timesteps=resume_path is None
         )
     except KeyboardInterrupt:
         print("Training interrupted by user.")
     finally:
         final_model_path = os.path.join(MODEL_SAVE_DIR, f"{MODEL_NAME}_final")
         print(f"Saving final model to: {final_model_path}")
-        model.save(final_model_path)
+        checkpoint_callback.save_now(final_model_path, model)
         vec_env.close()
+        checkpoint_callback.close()
+        eval_callback.close()
 
     print("Training finished.")
     print(f"To view logs, run: tensorboard --logdir {LOG_DIR}")
@@ -0,0 +1,199 @@
+import math
+import multiprocessing as mp
+import socket
+import struct
+import sys
+
+import gymnasium as gym
+import numpy as np
+import pygame
+
+from const import *
+
+
+# One datagram per update: table id, ball count, shots since reset, then float32 x/y per
+# ball and one pocketed byte per ball.
+HEADER = struct.Struct("<HHI")
+
+
+def encode_update(table_id, shots, positions, pocketed):
+    positions = np.asarray(positions, dtype=np.float32)
+    return (HEADER.pack(table_id, len(positions), shots) + positions.tobytes()
+            + np.asarray(pocketed, dtype=np.uint8).tobytes())
+
+
+def decode_update(data):
+    """Returns (table_id, shots, positions, pocketed) from an encode_update datagram."""
+    table_id, n, shots = HEADER.unpack_from(data)
+    offset = HEADER.size
+    positions = np.frombuffer(data, dtype=np.float32, count=2 * n, offset=offset).reshape(n, 2)
+    pocketed = np.frombuffer(data, dtype=np.uint8, count=n, offset=offset + 8 * n).astype(bool)
+    return table_id, shots, positions, pocketed
+
+
+class ViewerPublisher:
+    """
+    Sends a table's ball positions to the viewer. Updates are fire-and-forget UDP datagrams
+    on a non-blocking socket: if no viewer is listening or its buffer is full, they are
+    dropped and the worker carries on.
+    """
+
+    def __init__(self, table_id, address=VIEWER_ADDRESS):
+        self.table_id = table_id
+        self.address = address
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.dropped = 0
+
+    def publish(self, table, shots):
+        positions = [ball.body.position for ball in table.balls]
+        pocketed = [ball.pocketed for ball in table.balls]
+        try:
+            self.sock.sendto(encode_update(self.table_id, shots, positions, pocketed), self.address)
+        except OSError:
+            self.dropped += 1
+
+    def close(self):
+        self.sock.close()
+
+
+class ViewerWrapper(gym.Wrapper):
+    """Publishes the table of a PoolEnv to the viewer after every reset and step."""
+
+    def __init__(self, env, table_id, address=VIEWER_ADDRESS):
+        super().__init__(env)
+        self.publisher = ViewerPublisher(table_id, address)
+        self.shots = 0
+
+    def reset(self, **kwargs):
+        result = self.env.reset(**kwargs)
+        self.shots = 0
+        self.publisher.publish(self.env.unwrapped.table, self.shots)
+        return result
+
+    def step(self, action):
+        result = self.env.step(action)
+        self.shots += 1
+        self.publisher.publish(self.env.unwrapped.table, self.shots)
+        return result
+
+    def close(self):
+        self.publisher.close()
+        return self.env.close()
+
+
+class Viewer:
+    """
+    Draws the latest state of many tables as a tiled grid. The table background is drawn
+    once at full size, scaled to a tile and then only blitted; per frame just the tiles
+    that received an update are redrawn and pushed to the display.
+    """
+
+    def __init__(self, num_tables, address=VIEWER_ADDRESS, tile_width=320, columns=None):
+        self.num_tables = num_tables
+        self.columns = columns or math.ceil(math.sqrt(num_tables))
+        self.rows = math.ceil(num_tables / self.columns)
+        self.scale = tile_width / WIDTH
+        self.tile_size = (tile_width, round(HEIGHT * self.scale))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(address)
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self.states = {}
+        self.dirty = set(range(num_tables))
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.columns * self.tile_size[0], self.rows * self.tile_size[1]))
+        pygame.display.set_caption(f"Pool tables ({num_tables})")
+        self.font = pygame.font.Font(None, 20)
+        self.background = self.draw_background()
+        self.radius = max(1, round(BALL_RADIUS * self.scale))
+
+    def draw_background(self):
+        """Renders the static table once and scales it to the tile size."""
+        surface = pygame.Surface((WIDTH, HEIGHT))
+        surface.fill(GREEN)
+        for start, end in POCKET_LINES:
+            pygame.draw.line(surface, BLACK, start, end, 5)
+        for start, end in WALL_LINES:
+            pygame.draw.line(surface, BROWN, start, end, 5)
+        return pygame.transform.smoothscale(surface, self.tile_size).convert()
+
+    def tile_rect(self, table_id):
+        row, column = divmod(table_id, self.columns)
+        return pygame.Rect(column * self.tile_size[0], row * self.tile_size[1], *self.tile_size)
+
+    def poll(self):
+        """Reads every queued update, keeping only the newest per table. Returns how many were read."""
+        count = 0
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return count
+            try:
+                table_id, shots, positions, pocketed = decode_update(data)
+            except (struct.error, ValueError):
+                continue
+            if table_id < self.num_tables:
+                self.states[table_id] = (shots, positions, pocketed)
+                self.dirty.add(table_id)
+                count += 1
+
+    def draw(self):
+        """Redraws the tiles that changed since the last call and returns their rects."""
+        rects = []
+        for table_id in sorted(self.dirty):
+            rect = self.tile_rect(table_id)
+            self.screen.blit(self.background, rect)
+            state = self.states.get(table_id)
+            if state is not None:
+                shots, positions, pocketed = state
+                for i, ((x, y), gone) in enumerate(zip(positions, pocketed)):
+                    if not gone:
+                        center = (rect.x + round(x * self.scale), rect.y + round(y * self.scale))
+                        pygame.draw.circle(self.screen, RED if i == 0 else WHITE, center, self.radius)
+                label = self.font.render(f"#{table_id}  shot {shots}", True, WHITE)
+                self.screen.blit(label, (rect.x + 6, rect.y + 4))
+            rects.append(rect)
+        self.dirty.clear()
+        return rects
+
+    def run(self, fps=30):
+        clock = pygame.time.Clock()
+        pygame.display.flip()
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    running = False
+            self.poll()
+            rects = self.draw()
+            if rects:
+                pygame.display.update(rects)
+            clock.tick(fps)
+        self.close()
+
+    def close(self):
+        self.sock.close()
+        pygame.display.quit()
+        pygame.quit()
+
+
+def run_viewer(num_tables, address=VIEWER_ADDRESS, tile_width=320, fps=30):
+    Viewer(num_tables, address, tile_width).run(fps)
+
+
+def start_viewer(num_tables, address=VIEWER_ADDRESS, tile_width=320, fps=30):
+    """Starts the viewer in its own process; closing its window ends it."""
+    process = mp.get_context("spawn").Process(target=run_viewer, args=(num_tables, address, tile_width, fps),
+                                              daemon=True)
+    process.start()
+    return process
+
+
+if __name__ == "__main__":
+    NUM_TABLES = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    run_viewer(NUM_TABLES)
@@ -0,0 +1,128 @@
+import multiprocessing as mp
+import multiprocessing.forkserver
+import os
+import sys
+import time
+
+import numpy as np
+
+from const import OBSERVATION_GROUPS
+
+try:
+    from stable_baselines3.common.vec_env import SubprocVecEnv
+except ImportError:
+    print("Error: Could not import Stable Baselines3 components.")
+    print("Please install stable-baselines3: pip install stable-baselines3[extra]")
+    exit()
+
+
+# Imported once by the fork server; every env worker forked from it starts with them loaded.
+PRELOAD_MODULES = ["torch", "stable_baselines3", "pygame", "pymunk", "table", "pool_env", "worker_pool"]
+
+# Ball counts (comma separated) to pre-build a PoolEnv for in the fork server. Only set in
+# the fork server's environment, never in the process that starts it.
+WARM_BALLS_VAR = "POOL_WARM_BALLS"
+
+# Pre-built envs by ball count. Only populated inside the fork server; each forked worker
+# gets its own copy-on-write copy and takes it once.
+TEMPLATES = {}
+
+
+def build_templates(balls):
+    """Builds one default PoolEnv per ball count in the comma separated string balls."""
+    from pool_env import PoolEnv
+
+    for n in balls.split(","):
+        if n.strip():
+            TEMPLATES[int(n)] = PoolEnv(int(n))
+
+
+def take_env(n, telemetry=False, observation_groups=OBSERVATION_GROUPS):
+    """Returns the pre-built env for n balls if this process has one, otherwise builds a new one."""
+    env = TEMPLATES.pop(n, None)
+    if env is None or env.observation_groups != env.table.observation_groups(observation_groups):
+        from pool_env import PoolEnv
+        return PoolEnv(n, telemetry=telemetry, observation_groups=observation_groups)
+    env.telemetry = telemetry
+    return env
+
+
+def warm_context(balls):
+    """
+    Starts a fork server that pre-imports PRELOAD_MODULES and pre-builds a PoolEnv for each
+    ball count in balls, and returns its context. Has to run before the first forkserver
+    process of this interpreter is started; a server that is already running is reused as is.
+    """
+    ctx = mp.get_context("forkserver")
+    ctx.set_forkserver_preload(PRELOAD_MODULES)
+    previous = os.environ.get(WARM_BALLS_VAR)
+    os.environ[WARM_BALLS_VAR] = ",".join(str(n) for n in balls)
+    try:
+        multiprocessing.forkserver.ensure_running()
+    finally:
+        if previous is None:
+            del os.environ[WARM_BALLS_VAR]
+        else:
+            os.environ[WARM_BALLS_VAR] = previous
+    return ctx
+
+
+def make_vec_env(env_fns, balls):
+    """SubprocVecEnv whose workers are forked from a pre-warmed fork server."""
+    if sys.platform == "win32":
+        return SubprocVecEnv(env_fns, start_method="spawn")
+    warm_context(balls)
+    return SubprocVecEnv(env_fns, start_method="forkserver")
+
+
+def time_to_first_step(make):
+    """
+    Builds a vec env with make(), resets it and takes one random step. The envs are reset
+    again afterwards so the probe step leaves no trace in their episodes. Returns (vec_env, seconds).
+    """
+    start = time.perf_counter()
+    vec_env = make()
+    vec_env.reset()
+    actions = np.array([vec_env.action_space.sample() for _ in range(vec_env.num_envs)])
+    vec_env.step(actions)
+    elapsed = time.perf_counter() - start
+    vec_env.reset()
+    return vec_env, elapsed
+
+
+def make_env(n, telemetry=False, observation_groups=OBSERVATION_GROUPS):
+    def _init():
+        return take_env(n, telemetry=telemetry, observation_groups=observation_groups)
+    return _init
+
+
+if WARM_BALLS_VAR in os.environ and __name__ == "worker_pool":
+    # Imported as a fork server preload: pre-build the template envs.
+    build_templates(os.environ[WARM_BALLS_VAR])
+
+
+if __name__ == "__main__":
+    NUM_BALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    NUM_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    # Each method runs in a fresh interpreter so nothing is imported or running beforehand.
+    if len(sys.argv) > 3:
+        import worker_pool
+        method = sys.argv[3]
+        # Through the module, not __main__, so forked workers find the fork server's templates.
+        fns = [worker_pool.make_env(NUM_BALLS) for _ in range(NUM_WORKERS)]
+        if method == "forkserver":
+            make = lambda: make_vec_env(fns, [NUM_BALLS])
+        else:
+            make = lambda: SubprocVecEnv(fns, start_method=method)
+        vec_env, cold = time_to_first_step(make)
+        vec_env.close()
+        # A second pool in the same interpreter, as after a restart during a sweep.
+        vec_env, warm = time_to_first_step(make)
+        vec_env.close()
+        print(f"{method:>10} first pool {cold:6.2f} s  restarted pool {warm:6.2f} s")
+    else:
+        import subprocess
+        print(f"Time to first step for {NUM_WORKERS} workers with {NUM_BALLS} balls")
+        for method in ("spawn", "forkserver"):
+            subprocess.run([sys.executable, __file__, str(NUM_BALLS), str(NUM_WORKERS), method], check=True)